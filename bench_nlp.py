@@ -0,0 +1,149 @@
+# File: bench_nlp.py
+"""
+Latency benchmark for NLPProcessor.
+
+Times each parse stage over a representative utterance corpus and reports
+p50/p95/p99 per stage, plus cold-start time measured in a fresh interpreter.
+Results are written as JSON so runs can be compared across commits.
+
+Usage:
+    python bench_nlp.py [--repeat 20] [--output bench_nlp.json]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+STATIONS_CSV = ROOT / "Task2" / "data" / "stations.csv"
+
+CORPUS = {
+    "greeting": [
+        "hello", "hi there", "good morning", "hey, can you help me?", "thanks!",
+    ],
+    "ticket_request": [
+        "I want the cheapest ticket from Norwich to London Liverpool Street tomorrow at 8pm",
+        "book a train from Ipswich to Cambridge on 15 July",
+        "what's the fare from Norwich to Oxford next Friday at 09:30",
+        "find me a single journey from Colchester to Norwich on 2025-07-15",
+        "cheapest return trip from London to Norwich on 3rd August returning 10 August at 17:45",
+    ],
+    "slot_answer": [
+        "yes", "no", "single", "return", "norwich", "london liverpool street",
+        "tomorrow", "20:00", "at 8pm", "2025-07-15", "one-way",
+    ],
+    "typo": [
+        "norwhich", "ipswitch", "cambrdge", "londn liverpool street", "manchestr piccadilly",
+    ],
+    "delay": [
+        "my train 1234 is delayed by 15 minutes at Ipswich, when will it reach Norwich?",
+        "train 567 running 10 minutes late from Colchester to London",
+        "predict arrival for train 42, delayed 5 minutes at Diss",
+    ],
+}
+
+STAGES = ("predict_intent", "extract_datetimes", "extract_stations",
+          "extract_trip_type", "extract_train_info", "parse")
+
+_COLD_START = (
+    "import time; t=time.perf_counter(); "
+    "from nlp_module import get_processor; p=get_processor({csv!r}); "
+    "p.parse('hello'); print(time.perf_counter()-t)"
+)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(samples: list[float]) -> dict:
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "mean_ms": sum(ms) / len(ms),
+    }
+
+
+def measure_cold_start(runs: int) -> dict:
+    """Time import + processor build + first parse in fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _COLD_START.format(csv=str(STATIONS_CSV))],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return summarize(samples)
+
+
+def measure_stages(proc, repeat: int) -> dict:
+    timings = {stage: [] for stage in STAGES}
+    by_category = {cat: [] for cat in CORPUS}
+    clock = time.perf_counter
+    for _ in range(repeat):
+        for category, texts in CORPUS.items():
+            for text in texts:
+                t0 = clock(); intent, _ = proc.predict_intent(text)
+                t1 = clock(); proc.extract_datetimes(text)
+                t2 = clock(); proc.extract_stations(text, intent)
+                t3 = clock(); proc.extract_trip_type(text)
+                t4 = clock(); proc.extract_train_info(text)
+                t5 = clock(); proc.parse(text)
+                t6 = clock()
+                for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5)):
+                    timings[stage].append(dt)
+                by_category[category].append(t6 - t5)
+    return {
+        "stages": {stage: summarize(s) for stage, s in timings.items()},
+        "parse_by_category": {cat: summarize(s) for cat, s in by_category.items()},
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--cold-runs", type=int, default=3, help="fresh-process cold starts")
+    parser.add_argument("--output", default="bench_nlp.json", help="JSON results path")
+    args = parser.parse_args(argv)
+
+    import station_cache
+    from nlp_module import NLPProcessor
+    tables = station_cache.load_tables(stations_csv=STATIONS_CSV)
+    # Parse cache off, so repeats measure real work
+    proc = NLPProcessor(station_dict=tables["stations"], gazetteer=tables["gazetteer"],
+                        fuzzy=tables["fuzzy"], cache_size=0)
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "cold_start": measure_cold_start(args.cold_runs),
+        **measure_stages(proc, args.repeat),
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    print(f"cold start: p50 {results['cold_start']['p50_ms']:.1f} ms")
+    print(f"{'stage':<20}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for stage, s in results["stages"].items():
+        print(f"{stage:<20}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
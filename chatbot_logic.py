@@ -1,78 +1,194 @@
+import asyncio
+import itertools
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
-from nlp_module import NLPProcessor
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError
+import metrics
+from resources import Resources, get_resources
 from trainlinescraper import find_cheapest_ticket
+from ticket_search import SearchBusy, SearchScheduler, search_key
+
+SEARCHES = metrics.counter("ticket_searches", "Ticket searches requested, by how they were served.",
+                           ("source",))
+
+
+class DialogueState:
+    """
+    Per-conversation dialogue state. Slotted and lock-carrying so one Chatbot
+    can serve many of them concurrently at a few hundred bytes each.
+    """
+    __slots__ = ("key", "intent", "slots", "confirm_done", "jobs", "prefetch", "last_seen", "lock")
+
+    def __init__(self, key: str = None):
+        self.key = key
+        self.jobs = None
+        # (search_key, Future) of a speculative search started before the last slot
+        self.prefetch = None
+        self.lock = threading.Lock()
+        self.reset()
+        self.touch()
+
+    def reset(self):
+        """Clear dialogue state for a new conversation."""
+        self.drop_prefetch()
+        self.intent = None
+        self.slots = {}
+        self.confirm_done = False
+
+    def drop_prefetch(self) -> bool:
+        """Cancel the speculative search, if any; True when there was one."""
+        if self.prefetch is None:
+            return False
+        self.prefetch[1].cancel()
+        self.prefetch = None
+        return True
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
 
 class Chatbot:
     """
     Chatbot class logic handling dialogue state, external calls, and responses.
+
+    The NLP pipeline, station registry, search scheduler and caches are borrowed
+    from the process-wide Resources, so a Chatbot is cheap to create and reset().
+
+    With async_search=True a completed conversation does not block on the ticket
+    search: respond() returns straight away with a job id, and the result is
+    delivered through on_result(job_id, response), poll(job_id) or wait(job_id).
+
+    Results are cached per route/date/time bucket/trip type in ticket_cache
+    (pass ticket_cache=False to disable, or a TicketCache of its own, e.g. with a
+    path to persist).
+
+    Searches run on a SearchScheduler with a bounded queue; when it is full, or a
+    conversation already has max_session_searches running, the user is told to
+    try again shortly instead of being left waiting.
+
+    With prefetch=True a search is started speculatively on an idle worker once
+    stations, date and time are known, assuming PREFETCH_TRIP_TYPE; it is reused
+    if the user's answer matches and dropped otherwise.
     """
-    def __init__(self):
+    SEARCH_TIMEOUT = 300
+    PREFETCH_TRIP_TYPE = "single"
+
+    def __init__(self, async_search: bool = False, on_result=None, ticket_cache=None,
+                 scheduler: SearchScheduler = None, max_session_searches: int = 2,
+                 prefetch: bool = False, resources: Resources = None):
         self.logger = logging.getLogger(__name__)
-        # Load NLP with full station list
-        self.nlp = NLPProcessor(stations_csv_path="Task2/data/stations.csv")
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self._reset_state()
+        self.async_search = async_search
+        self.on_result = on_result
+        self.resources = resources or get_resources()
+        if ticket_cache is None:
+            ticket_cache = self.resources.ticket_cache
+        self.ticket_cache = ticket_cache or None
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+        self._turn_ids = itertools.count(1)
+        self.nlp = self.resources.nlp
+        self.registry = self.resources.registry
+        self.scheduler = scheduler or self.resources.scheduler
+        self.single_flight = self.resources.single_flight
+        self.max_session_searches = max_session_searches
+        self.prefetch = prefetch
+        self.prefetch_stats = {"started": 0, "used": 0, "discarded": 0}
+        self.session = DialogueState()
 
-    def _reset_state(self):
-        """Clear dialogue state for a new conversation."""
-        self.state = {"intent": None, "slots": {}}
-        self.confirm_done = False
+    def reset(self):
+        """Start a new conversation: cancel this bot's searches and clear its state."""
+        self.cancel()
+        self._drop_prefetch(self.session)
+        self.session.reset()
+
+    def respond(self, user_text: str, state: DialogueState = None) -> str:
+        """
+        Generate a response for the user's message. state selects the conversation;
+        by default this bot's own session is used. Callers sharing one Chatbot across
+        conversations must serialize calls per state (SessionManager does).
+        Each turn gets a trace id, which the searches it starts carry too.
+        """
+        st = state if state is not None else self.session
+        turn = f"turn-{next(self._turn_ids)}"
+        with metrics.trace(f"{st.key}:{turn}" if st.key is not None else turn):
+            return self._respond(user_text, st)
 
-    def respond(self, user_text: str) -> str:
-        """Generate a response for the user's message."""
+    @metrics.traced("chatbot_respond")
+    def _respond(self, user_text: str, st: DialogueState) -> str:
         raw = user_text.strip()
         text = raw.lower()
 
+        # Cancel a running search
+        if self._active_jobs(st) and re.match(r'^(cancel|stop)\b', text):
+            cancelled = self.cancel(state=st)
+            self.logger.info(f"User cancelled searches: {cancelled}")
+            return "OK, I've cancelled your ticket search. What would you like to do next?"
+
         # If we're waiting on station confirmation:
-        if self.state.get("intent") == "find_ticket" and self.confirm_done:
+        if st.intent == "find_ticket" and st.confirm_done:
             # Positive confirmation
             if re.match(r'^(yes|y|correct|right)\b', text):
                 self.logger.info("User confirmed stations")
-                return self._handle_find_ticket()
+                return self._handle_find_ticket(st)
             # Negative confirmation (e.g. "no", "no not correct")
             if re.match(r'^(no|n)\b', text) or "not correct" in text:
                 self.logger.info("User denied station confirmation")
-                self.confirm_done = False
+                st.confirm_done = False
                 # Clear previously captured stations
-                slots = self.state["slots"]
+                slots = st.slots
                 slots.pop("departure", None)
                 slots.pop("destination", None)
                 return "(Info needed) Where are you departing from?"
 
-        # Standard parse
-        parsed = self.nlp.parse(raw)
+        # Standard parse, limited to the slot we just asked for when there is one
+        parsed = self.nlp.parse(raw, expect=self._expected_slots(st))
         intent = parsed["intent"]
         confidence = parsed["confidence"]
         slots = parsed["slots"]
         self.logger.debug(f"Parsed intent={intent} (conf={confidence:.2f}), slots={slots}")
 
         # First turn: guard unsupported or very low confidence
-        if self.state["intent"] is None:
+        if st.intent is None:
             if intent == "unsupported" or confidence < 0.05:
                 self.logger.info("Fallback on first turn: unsupported or low confidence")
-                self._reset_state()
+                st.reset()
                 return (
                     "Sorry, I can only help with UK train enquiries. "
                     "Could you rephrase or ask about train tickets or delays?"
                 )
-            self.state["intent"] = intent
+            st.intent = intent
 
         # Update slots
-        self.state["slots"].update(slots)
+        st.slots.update(slots)
 
         # Route to the appropriate handler
-        if self.state["intent"] == "find_ticket":
-            return self._handle_find_ticket()
+        if st.intent == "find_ticket":
+            return self._handle_find_ticket(st)
 
         # Catch-all fallback
-        self._reset_state()
+        st.reset()
         return "Sorry, I don't know how to help with that."
 
-    def _handle_find_ticket(self) -> str:
+    def _expected_slots(self, st: DialogueState) -> tuple | None:
+        """Slots the last prompt asked for, mirroring _handle_find_ticket's order."""
+        if st.intent != "find_ticket":
+            return None
+        s = st.slots
+        if not st.confirm_done:
+            if "departure" not in s or "destination" not in s:
+                return ("departure", "destination")
+            return None
+        for slot in ("date", "time", "trip_type"):
+            if slot not in s:
+                return (slot,)
+        return None
+
+    @metrics.traced("slot_logic")
+    def _handle_find_ticket(self, st: DialogueState) -> str:
         """Slot-filling and ticket lookup logic."""
-        s = self.state["slots"]
+        s = st.slots
 
         # Promote any fuzzy‐matched station codes
         if "stations" in s:
@@ -82,19 +198,12 @@ class Chatbot:
             elif "destination" not in s and codes:
                 s["destination"] = codes[0]
 
-        # Build reverse map: code -> pretty station name
-        code_to_name = {}
-        for name, code in self.nlp.stations.items():
-            if code not in code_to_name:
-                pretty = name.title().replace(" Rail Station", "")
-                code_to_name[code] = pretty
-
         # Step 1: Confirm stations (use full names)
-        if not self.confirm_done:
+        if not st.confirm_done:
             if "departure" in s and "destination" in s:
-                dep_name = code_to_name.get(s["departure"], s["departure"])
-                dst_name = code_to_name.get(s["destination"], s["destination"])
-                self.confirm_done = True
+                dep_name = self.registry.display_name(s["departure"])
+                dst_name = self.registry.display_name(s["destination"])
+                st.confirm_done = True
                 self.logger.info("Asking station confirmation")
                 return (
                     f"Just to confirm: you want to travel from {dep_name} to {dst_name}, correct?"
@@ -111,41 +220,222 @@ class Chatbot:
         if "time" not in s:
             return "(Info needed) At what time would you prefer? Please use 24-hour HH:MM format."
         if "trip_type" not in s:
+            if self.prefetch:
+                self._prefetch(st)
             return "(Info needed) Is this a single or return trip?"
 
         # Step 3: All slots present – perform ticket search
-        dep_name = code_to_name.get(s["departure"], s["departure"])
-        dst_name = code_to_name.get(s["destination"], s["destination"])
+        dep_name = self.registry.display_name(s["departure"])
+        dst_name = self.registry.display_name(s["destination"])
+
+        active = self._active_jobs(st)
+        if active >= self.max_session_searches:
+            self.logger.info("Per-session search limit reached")
+            return (
+                f"You already have {active} searches running. Please wait for one "
+                "to finish, or say 'cancel' to stop them."
+            )
 
         self.logger.info(f"All slots filled: {s}, initiating ticket search")
-        future = self.executor.submit(
+        try:
+            future = self._submit_search(dep_name, dst_name, s, st)
+        except SearchBusy as e:
+            # Keep the filled slots so any reply (e.g. "retry") searches again
+            SEARCHES.inc(source="rejected")
+            self.logger.warning(f"Search rejected: {e}")
+            secs = round(e.retry_after)
+            return (
+                "Sorry, I'm handling a lot of ticket searches right now. "
+                f"Please try again in about {secs} second{'s' if secs != 1 else ''}."
+            )
+        # The conversation is complete either way; the next message starts afresh
+        st.reset()
+
+        # Cache hits and finished prefetches are answered now, not as a background job
+        if self.async_search and not future.done():
+            job_id = f"job-{next(self._job_ids)}"
+            if st.key is not None:
+                job_id = f"{st.key}:{job_id}"
+            self._jobs[job_id] = (future, st)
+            if st.jobs is None:
+                st.jobs = set()
+            st.jobs.add(job_id)
+            future.add_done_callback(lambda f, job_id=job_id: self._deliver(job_id, f))
+            self.logger.info(f"Ticket search {job_id} queued")
+            return (
+                f"Searching for tickets from {dep_name} to {dst_name}… (ref: {job_id}). "
+                "I'll let you know when I have results; say 'cancel' to stop."
+            )
+
+        # Step 4: Present result
+        with metrics.span("search_wait"):
+            return self._search_response(future, timeout=self.SEARCH_TIMEOUT)
+
+    def _prefetch(self, st: DialogueState):
+        """Speculatively start the likeliest search while the user picks a trip type."""
+        s = st.slots
+        departure = self.registry.display_name(s["departure"])
+        destination = self.registry.display_name(s["destination"])
+        guess = dict(s, trip_type=self.PREFETCH_TRIP_TYPE)
+        key = search_key(departure, destination, s["date"], s.get("time"), guess["trip_type"])
+        if st.prefetch is not None and st.prefetch[0] == key:
+            return
+        self._drop_prefetch(st)
+        if self.ticket_cache is not None and self.ticket_cache.get(key) is not None:
+            return
+        try:
+            # Only on an idle worker, leaving one free for real searches
+            future = self.single_flight.submit(key, self._start_search, key, departure,
+                                               destination, guess, speculative=True)
+        except SearchBusy:
+            return
+        st.prefetch = (key, future)
+        self.prefetch_stats["started"] += 1
+        self.logger.info(f"Prefetching {key}")
+
+    def _drop_prefetch(self, st: DialogueState):
+        if st.drop_prefetch():
+            self.prefetch_stats["discarded"] += 1
+
+    def _submit_search(self, departure: str, destination: str, s: dict,
+                       st: DialogueState = None) -> Future:
+        """Start a ticket search, answering from a prefetch or the result cache when possible."""
+        key = search_key(departure, destination, s["date"], s.get("time"), s["trip_type"])
+        if st is not None and st.prefetch is not None:
+            if st.prefetch[0] == key:
+                future = st.prefetch[1]
+                st.prefetch = None
+                self.prefetch_stats["used"] += 1
+                SEARCHES.inc(source="prefetch")
+                self.logger.info(f"Using prefetched search for {key}")
+                return future
+            self._drop_prefetch(st)
+        if self.ticket_cache is not None:
+            ticket = self.ticket_cache.get(key)
+            if ticket is not None:
+                self.logger.info(f"Ticket cache hit for {key}")
+                SEARCHES.inc(source="cache")
+                future = Future()
+                future.set_result(ticket)
+                return future
+
+        future = self.single_flight.submit(key, self._start_search, key, departure, destination, s)
+        SEARCHES.inc(source="search")
+        return future
+
+    def _start_search(self, key: tuple, departure: str, destination: str, s: dict,
+                      speculative: bool = False) -> Future:
+        submit = self.scheduler.submit_idle if speculative else self.scheduler.submit
+        future = submit(
             find_cheapest_ticket,
-            departure=dep_name,
-            destination=dst_name,
+            departure=departure,
+            destination=destination,
             date=s["date"],
             time_of_day=s.get("time"),
             trip_type=s["trip_type"]
         )
+        if self.ticket_cache is not None:
+            future.add_done_callback(lambda f: self._cache_result(key, f))
+        return future
 
+    def _cache_result(self, key: tuple, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.ticket_cache.put(key, future.result())
+
+    def _search_response(self, future, timeout=None) -> str:
+        """Turn a finished (or finishing) search future into the reply text."""
         try:
-            ticket = future.result(timeout=300)
+            ticket = future.result(timeout=timeout)
         except TimeoutError:
             self.logger.error("Ticket search timed out")
-            self._reset_state()
             return "Sorry, searching for tickets is taking too long. Please try again later."
+        except CancelledError:
+            return "Your ticket search was cancelled."
         except Exception:
             self.logger.exception("Error during ticket search")
-            self._reset_state()
             return "Oops, something went wrong fetching tickets. Try again later."
 
-        # Step 4: Present result and reset
-        response = f"The cheapest fare is £{ticket.price:.2f}. Book here: {ticket.url}"
         self.logger.info("Presented cheapest ticket to user")
-        self._reset_state()
-        return response
+        if ticket.price is None:
+            return f"Here are the cheapest fares I found: {ticket.url}"
+        return f"The cheapest fare is £{ticket.price:.2f}. Book here: {ticket.url}"
+
+    def _active_jobs(self, st: DialogueState) -> int:
+        """Number of st's searches still running; finished ones are dropped from st.jobs."""
+        if not st.jobs:
+            return 0
+        for job_id in list(st.jobs):
+            entry = self._jobs.get(job_id)
+            if entry is None or entry[0].done():
+                st.jobs.discard(job_id)
+        return len(st.jobs)
+
+    def _pop_job(self, job_id: str):
+        future, st = self._jobs.pop(job_id, (None, None))
+        if st is not None and st.jobs:
+            st.jobs.discard(job_id)
+        return future
+
+    def _deliver(self, job_id: str, future):
+        # Cancelled jobs have already been dropped from _jobs; stay quiet for them
+        if job_id not in self._jobs or self.on_result is None:
+            return
+        self._pop_job(job_id)
+        try:
+            self.on_result(job_id, self._search_response(future))
+        except Exception:
+            self.logger.exception(f"on_result callback failed for {job_id}")
+
+    def poll(self, job_id: str) -> str | None:
+        """Reply for a finished job, or None while it is still running or unknown."""
+        future, _ = self._jobs.get(job_id, (None, None))
+        if future is None or not future.done():
+            return None
+        self._pop_job(job_id)
+        return self._search_response(future)
+
+    async def wait(self, job_id: str) -> str | None:
+        """Await a job from asyncio code and return its reply (None for an unknown id)."""
+        future, _ = self._jobs.get(job_id, (None, None))
+        if future is None:
+            return None
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Re-raise if it is the awaiting task being cancelled, not the job
+            if not future.cancelled():
+                raise
+        except Exception:
+            pass  # _search_response reports the failure
+        self._pop_job(job_id)
+        return self._search_response(future)
+
+    def cancel(self, job_id: str = None, state: DialogueState = None) -> list[str]:
+        """
+        Cancel one job, the jobs (and prefetch) of one conversation, or all of this
+        bot's jobs. A search that is already running cannot be interrupted, but its
+        result is discarded.
+        """
+        if job_id:
+            ids = [job_id]
+        elif state is not None:
+            self._drop_prefetch(state)
+            ids = list(state.jobs or ())
+        else:
+            ids = list(self._jobs)
+        for jid in ids:
+            future = self._pop_job(jid)
+            if future is not None:
+                future.cancel()
+        return ids
 
-# Singleton instance for GUI/CLI
-_bot = Chatbot()
+# Singleton instance for GUI/CLI, created on first use rather than at import
+_bot = None
+_bot_lock = threading.Lock()
 
 def get_bot_response(msg: str) -> str:
+    global _bot
+    with _bot_lock:
+        if _bot is None:
+            _bot = Chatbot()
     return _bot.respond(msg)
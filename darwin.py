@@ -3,7 +3,7 @@ import xml.etree.ElementTree as ET
 from io import BytesIO
 import gzip
 from collections import defaultdict
-from station_lookup import get_tiploc_from_crs, get_name_from_crs
+from station_registry import get_registry
 from dotenv import load_dotenv
 import os
 
@@ -47,8 +47,9 @@ def list_available_file_versions():
 
 def parse_journey_file(file_key, origin_crs='NRW', dest_crs='LST', latest_dep_time='10:00'):
     """Parse a Darwin XML timetable file and find valid journeys."""
-    origin_tiploc = get_tiploc_from_crs(origin_crs)
-    dest_tiploc = get_tiploc_from_crs(dest_crs)
+    registry = get_registry()
+    origin_tiploc = registry.tiploc_from_crs(origin_crs)
+    dest_tiploc = registry.tiploc_from_crs(dest_crs)
 
     if not origin_tiploc or not dest_tiploc:
         print(f" Could not find TIPLOCs for {origin_crs} or {dest_crs}")
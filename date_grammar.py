@@ -0,0 +1,173 @@
+# File: date_grammar.py
+"""
+Fast-path date/time extraction for the forms users actually type
+(ISO dates, "15 July", "tomorrow", "next Friday", "HH:MM", "at 8pm").
+dateparser is only consulted when this grammar finds nothing but the text
+still looks date-like.
+"""
+import re
+import threading
+from datetime import date, datetime, time, timedelta
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+          r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+# Bare "mon", "wed", "sat" and "sun" are ordinary words ("I sat on the train"),
+# so on their own only full names and longer abbreviations count as weekdays
+_WEEKDAY = r"(?:(?:mon|tues|wednes|thurs|fri|satur|sun)day|tues?|weds|thu|thurs?|fri)"
+_WEEKDAY_SHORT = r"(?:mon|wed|sat|sun)"
+
+# One alternation, scanned once per utterance; named groups tell the pieces apart
+_GRAMMAR = re.compile(rf"""
+    (?P<iso>\b(?P<iy>\d{{4}})-(?P<im>\d{{1,2}})-(?P<id>\d{{1,2}})\b)
+  | (?P<dm>\b(?P<dd>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dmon>{_MONTH})\b\.?(?:,?\s+(?P<dy>\d{{4}})\b)?)
+  | (?P<md>\b(?P<mmon>{_MONTH})\s+(?P<mdd>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<my>\d{{4}})\b)?)
+  | (?P<rel>\b(?:today|tomorrow)\b)
+  | (?P<wd>\b(?:next\s+)?(?P<wday>{_WEEKDAY})\b|\bnext\s+(?P<nwday>{_WEEKDAY_SHORT})\b)
+  | (?P<hm>\b(?P<hh>[01]?\d|2[0-3]):(?P<hmin>[0-5]\d)\b(?:\s*(?P<hap>am|pm)\b)?)
+  | (?P<ampm>\b(?P<ah>1[0-2]|0?[1-9])(?:[.:](?P<amin>[0-5]\d))?\s*(?P<aap>am|pm)\b)
+""", re.IGNORECASE | re.VERBOSE)
+
+# What may separate a time from the date it belongs to ("20:00 on 15 July")
+_TIME_DATE_GAP = re.compile(r"\s*(?:on\s+)?", re.IGNORECASE)
+
+# Anything dateparser could plausibly turn into a date
+_DATE_LIKE = re.compile(
+    rf"\d|\b(?:{_MONTH}|{_WEEKDAY}|today|tonight|tomorrow|yesterday|noon|midnight"
+    r"|morning|afternoon|evening|day|days|week|weeks|month|months|year|years"
+    r"|hour|hours|minute|minutes|ago|next|last)\b",
+    re.IGNORECASE,
+)
+
+_DATEPARSER_SETTINGS = {"PREFER_DATES_FROM": "future"}
+_dateparser_lock = threading.Lock()
+_search_dates = None
+
+
+def preload():
+    """
+    Import dateparser and load its English locale data once, so the first
+    fallback call does not pay for it.
+    """
+    global _search_dates
+    with _dateparser_lock:
+        if _search_dates is None:
+            from dateparser.search import search_dates
+            search_dates("tomorrow at 10:00", languages=["en"], settings=_DATEPARSER_SETTINGS)
+            _search_dates = search_dates
+    return _search_dates
+
+
+def _future_date(year, month, day, today):
+    try:
+        if year:
+            return date(int(year), month, int(day))
+        d = date(today.year, month, int(day))
+        if d < today:
+            d = date(today.year + 1, month, int(day))
+        return d
+    except ValueError:
+        return None
+
+
+def _to_24h(hour, ampm):
+    hour = int(hour)
+    if ampm:
+        ampm = ampm.lower()
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+    return hour
+
+
+def _match_value(m, today):
+    """Return ('date', date) or ('time', time) for one grammar match, or None."""
+    kind = m.lastgroup
+    if kind == "iso":
+        try:
+            return "date", date(int(m["iy"]), int(m["im"]), int(m["id"]))
+        except ValueError:
+            return None
+    if kind == "dm":
+        d = _future_date(m["dy"], _MONTHS[m["dmon"][:3].lower()], m["dd"], today)
+        return ("date", d) if d else None
+    if kind == "md":
+        d = _future_date(m["my"], _MONTHS[m["mmon"][:3].lower()], m["mdd"], today)
+        return ("date", d) if d else None
+    if kind == "rel":
+        offset = 1 if m.group().lower() == "tomorrow" else 0
+        return "date", today + timedelta(days=offset)
+    if kind == "wd":
+        wday = m["wday"] or m["nwday"]
+        ahead = (_WEEKDAYS[wday[:3].lower()] - today.weekday()) % 7 or 7
+        return "date", today + timedelta(days=ahead)
+    if kind == "hm":
+        hour = _to_24h(m["hh"], m["hap"])
+        return "time", time(hour % 24, int(m["hmin"]))
+    if kind == "ampm":
+        return "time", time(_to_24h(m["ah"], m["aap"]), int(m["amin"] or 0))
+    return None
+
+
+def fast_datetimes(text: str, today: date = None) -> list[datetime]:
+    """
+    Datetimes found by the fast grammar, in text order. A time directly following
+    a date is merged into it, as is a time directly before a date ("at 8pm
+    tomorrow"); a lone time is taken as today, as dateparser does.
+    """
+    today = today or date.today()
+    matches = [(m, v) for m in _GRAMMAR.finditer(text) if (v := _match_value(m, today)) is not None]
+    found = []
+    pending_date = None
+    pending_time = None  # a time waiting to see whether a date follows it
+    prev_end = 0
+    for m, (kind, val) in matches:
+        if pending_time is not None:
+            if kind == "date" and _TIME_DATE_GAP.fullmatch(text, prev_end, m.start()):
+                # "at 8pm tomorrow": the time belongs to the date after it
+                found.append(datetime.combine(val, pending_time))
+                pending_time = None
+                prev_end = m.end()
+                continue
+            found.append(datetime.combine(today, pending_time))
+            pending_time = None
+        if kind == "date":
+            if pending_date is not None:
+                found.append(datetime.combine(pending_date, time()))
+            pending_date = val
+        elif pending_date is not None:
+            found.append(datetime.combine(pending_date, val))
+            pending_date = None
+        else:
+            pending_time = val
+        prev_end = m.end()
+    if pending_time is not None:
+        found.append(datetime.combine(today, pending_time))
+    if pending_date is not None:
+        found.append(datetime.combine(pending_date, time()))
+    return found
+
+
+def find_datetimes(text: str, today: date = None) -> list[datetime]:
+    """
+    Fast grammar first; dateparser (English only) when that finds nothing and
+    the text looks date-like.
+    """
+    found = fast_datetimes(text, today)
+    if found or not _DATE_LIKE.search(text):
+        return found
+    search_dates = preload()
+    matches = search_dates(text, languages=["en"], settings=_DATEPARSER_SETTINGS) or []
+    return [dt for _, dt in matches]
+
+
+def find_datetimes_many(texts, today: date = None) -> list[list[datetime]]:
+    """find_datetimes over a batch, sharing one notion of "today"."""
+    today = today or date.today()
+    return [find_datetimes(text, today) for text in texts]
@@ -6,6 +6,7 @@ import threading
 import logging
 
 from chatbot_logic import Chatbot
+from trainlinescraper import get_pool
 
 #Logs for chatbot
 logging.basicConfig(
@@ -16,7 +17,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-bot = Chatbot()
+def _on_search_result(job_id, response):
+    # Called from the search worker thread; hand over to the Tk main thread
+    root.after(0, lambda: _display_bot_response(response))
+
+
+# Ticket searches run in the background so the chat stays responsive
+bot = Chatbot(async_search=True, on_result=_on_search_result)
+# Launch the search browsers in the background while the window opens
+get_pool().prewarm()
 
 # Gui Functions
 def send_message(event=None):
@@ -86,8 +95,7 @@ def display_message(sender, message):
 
 
 def reset_conversation():
-    global bot
-    bot = Chatbot()  # reinstantiate to clear state
+    bot.reset()  # drop the old conversation's state and pending searches
     logger.info("Conversation reset by user.")
     chat_area.config(state='normal')
     chat_area.delete("1.0", tk.END)
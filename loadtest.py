@@ -0,0 +1,242 @@
+# File: loadtest.py
+"""
+Conversation load test for Chatbot.respond.
+
+Replays scripted multi-turn dialogues over N concurrent sessions with the
+Trainline scraper swapped for a stub of configurable latency, then reports
+throughput, turn-latency percentiles and memory per stage. Memory is read from
+the process RSS at stage boundaries only, so nothing traces allocations while
+latency is being measured; each stage reports its RSS change and its own peak
+(the kernel's high-water mark is reset between stages where Linux allows it).
+Conversations turned away as busy are counted separately and left out of the
+throughput figure. A script that ends without starting a search is a scripting
+error, so the run exits non-zero when any conversation is abandoned.
+
+Usage:
+    python loadtest.py [--sessions 50] [--conversations 500] [--search-latency 2.0]
+                       [--prefetch] [--output loadtest.json] [--metrics loadtest.prom]
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+from bench_nlp import summarize
+
+# Each script is one conversation; "{date}"/"{time}" are filled per conversation
+SCRIPTS = [
+    ["I want a train ticket from Norwich to London Liverpool Street", "yes", "{date}", "{time}", "single"],
+    ["book a train from Ipswich to Cambridge", "yes", "{date}", "{time}", "return"],
+    ["cheapest ticket please", "Norwich", "Ipswich", "yes", "{date}", "{time}", "single"],
+    ["I want to travel from Norwich to Colchester on {date}", "yes", "{time}", "one-way"],
+    ["hello", "what's the cheapest fare from Norwich to Diss", "yes", "{date}", "{time}", "single"],
+]
+DATES = ["tomorrow", "next Friday", "15 July", "2026-12-01"]
+TIMES = ["08:00", "09:30", "at 5pm", "17:45", "20:00"]
+# Replies that end a conversation without a search
+BUSY_REPLIES = ("Sorry, I'm handling a lot of ticket searches", "You already have ")
+# Replies that carry a ticket straight away (cache hit or finished prefetch)
+RESULT_REPLIES = ("Here are the cheapest fares", "The cheapest fare is")
+
+
+def rss_mb() -> tuple[float | None, float]:
+    """
+    (current, peak) resident set size in MB. Both come from /proc/self/status;
+    without it current is None and peak is the lifetime ru_maxrss.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return int(fields["VmRSS"].split()[0]) * 1024 / 1e6, int(fields["VmHWM"].split()[0]) * 1024 / 1e6
+    except (OSError, KeyError, ValueError):
+        return None, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6  # KiB
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS (VmHWM) so the next reading covers one stage only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def make_stub(latency: float):
+    def find_cheapest_ticket(departure, destination, date, time_of_day=None,
+                             trip_type="single", return_date=None, return_time=None):
+        time.sleep(latency)
+        return SimpleNamespace(price=None, url=f"https://www.thetrainline.com/stub/{departure}-{destination}")
+    return find_cheapest_ticket
+
+
+class LoadTest:
+    def __init__(self, sessions: int, conversations: int, search_latency: float, seed: int = 0,
+                 prefetch: bool = False):
+        self.sessions = sessions
+        self.prefetch = prefetch
+        self.conversations = conversations
+        self.search_latency = search_latency
+        self.rng = random.Random(seed)
+        self.turn_latency = []
+        self.search_latency_seen = []
+        self.stage_memory = {}
+        self._last_rss = None
+        self._peak_per_stage = False
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._all_done = threading.Event()
+        self._remaining = conversations
+        self.completed = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self.abandoned_scripts = {}
+
+    def _stage(self, name: str):
+        # Called between stages only, never while turns are being timed
+        current, peak = rss_mb()
+        change = None if current is None or self._last_rss is None else current - self._last_rss
+        self.stage_memory[name] = {"rss_mb": current, "rss_change_mb": change, "peak_rss_mb": peak,
+                                   "peak_is_lifetime": not self._peak_per_stage}
+        self._last_rss = current
+        self._peak_per_stage = reset_peak_rss()
+
+    def _on_result(self, session_id, job_id, reply):
+        with self._lock:
+            started = self._pending.pop(job_id, None)
+            if started is not None:
+                self.search_latency_seen.append(time.perf_counter() - started)
+            self.completed += 1
+            self._finish_one()
+
+    def _finish_one(self):
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._all_done.set()
+
+    def _conversation(self, manager, session_id: str, script: list[str], date: str, tod: str):
+        for turn in script:
+            text = turn.format(date=date, time=tod)
+            start = time.perf_counter()
+            reply = manager.respond(session_id, text)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.turn_latency.append(elapsed)
+                if "(ref: " in reply:
+                    job_id = reply.split("(ref: ", 1)[1].split(")", 1)[0]
+                    self._pending[job_id] = start
+                    return
+                if reply.startswith(RESULT_REPLIES):
+                    self.search_latency_seen.append(elapsed)
+                    self.completed += 1
+                    self._finish_one()
+                    return
+                if reply.startswith(BUSY_REPLIES):
+                    self.rejected += 1
+                    self._finish_one()
+                    return
+        # Script ended without starting a search (e.g. the bot misunderstood)
+        with self._lock:
+            self.abandoned += 1
+            self.abandoned_scripts[script[0]] = self.abandoned_scripts.get(script[0], 0) + 1
+            self._finish_one()
+
+    def run(self) -> dict:
+        self._stage("baseline")
+        t0 = time.perf_counter()
+        import chatbot_logic
+        from sessions import SessionManager
+        chatbot_logic.find_cheapest_ticket = make_stub(self.search_latency)
+        manager = SessionManager(on_result=self._on_result)
+        manager.bot.prefetch = self.prefetch
+        startup = time.perf_counter() - t0
+        self._stage("startup")
+
+        jobs = []
+        for i in range(self.conversations):
+            script = self.rng.choice(SCRIPTS)
+            jobs.append((f"load-{i}", script, self.rng.choice(DATES), self.rng.choice(TIMES)))
+
+        t1 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.sessions) as pool:
+            for sid, script, date, tod in jobs:
+                pool.submit(self._conversation, manager, sid, script, date, tod)
+        dialogue_time = time.perf_counter() - t1
+        self._stage("dialogue")
+
+        timeout = self.search_latency * self.conversations + 60
+        self._all_done.wait(timeout)
+        total_time = time.perf_counter() - t1
+        self._stage("searches")
+
+        bot = manager.bot
+        return {
+            "sessions": self.sessions,
+            "conversations": self.conversations,
+            "search_latency_s": self.search_latency,
+            "startup_s": startup,
+            "turns": len(self.turn_latency),
+            "turns_per_s": len(self.turn_latency) / dialogue_time if dialogue_time else 0.0,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "abandoned": self.abandoned,
+            "abandoned_scripts": self.abandoned_scripts,
+            "conversations_per_s": self.completed / total_time if total_time else 0.0,
+            "incomplete": max(self._remaining, 0),
+            "turn_latency": summarize(self.turn_latency) if self.turn_latency else None,
+            "search_latency": summarize(self.search_latency_seen) if self.search_latency_seen else None,
+            "memory_by_stage": self.stage_memory,
+            "parse_cache": bot.nlp.cache.stats() if bot.nlp.cache else None,
+            "ticket_cache": bot.ticket_cache.stats() if bot.ticket_cache else None,
+            "single_flight": bot.single_flight.stats(),
+            "scheduler": bot.scheduler.stats(),
+            "prefetch": bot.prefetch_stats if self.prefetch else None,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent sessions")
+    parser.add_argument("--conversations", type=int, default=500, help="total conversations")
+    parser.add_argument("--search-latency", type=float, default=2.0, help="stub scrape time (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefetch", action="store_true", help="enable speculative searches")
+    parser.add_argument("--output", default="loadtest.json", help="JSON results path")
+    parser.add_argument("--metrics", help="also write Prometheus metrics to this file")
+    args = parser.parse_args(argv)
+
+    results = LoadTest(args.sessions, args.conversations, args.search_latency, args.seed,
+                       args.prefetch).run()
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.metrics:
+        import metrics
+        metrics.write_textfile(args.metrics)
+
+    lat = results["turn_latency"] or {}
+    print(f"{results['conversations']} conversations over {results['sessions']} sessions")
+    print(f"completed {results['completed']}   rejected as busy {results['rejected']}   "
+          f"abandoned {results['abandoned']}   incomplete {results['incomplete']}")
+    print(f"turns/s: {results['turns_per_s']:.1f}   completed conversations/s: "
+          f"{results['conversations_per_s']:.2f}")
+    print(f"turn latency ms: p50 {lat.get('p50_ms', 0):.2f}  p95 {lat.get('p95_ms', 0):.2f}  "
+          f"p99 {lat.get('p99_ms', 0):.2f}")
+    for stage, mem in results["memory_by_stage"].items():
+        current = "n/a" if mem["rss_mb"] is None else f"{mem['rss_mb']:.1f} MB"
+        change = "" if mem["rss_change_mb"] is None else f" ({mem['rss_change_mb']:+.1f} MB)"
+        scope = "lifetime peak" if mem["peak_is_lifetime"] else "stage peak"
+        print(f"{stage:<10} rss {current}{change}   {scope} {mem['peak_rss_mb']:.1f} MB")
+    print(f"Wrote {args.output}")
+    if results["abandoned_scripts"]:
+        for first_turn, count in results["abandoned_scripts"].items():
+            print(f"Script never reached a search ({count}x): {first_turn!r}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
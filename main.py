@@ -1,14 +1,17 @@
 # main.py
 """
 Entry point for the Train-Checker chatbot.
-By default runs in the terminal; pass '--gui' to launch the Tkinter GUI.
+By default runs in the terminal; pass '--gui' to launch the Tkinter GUI, or
+'--serve [--port N]' to run the HTTP/WebSocket server on localhost.
 """
 
 import sys
 
 def run_cli():
     from chatbot_logic import Chatbot
+    from trainlinescraper import get_pool
     bot = Chatbot()
+    get_pool().prewarm()
     print("Bot: Hello! How can I help you today?")
     while True:
         try:
@@ -27,6 +30,15 @@ def run_cli():
         reply = bot.respond(user)
         print(f"Bot: {reply}")
 
+def run_server():
+    import logging
+    import server
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    port = 8765
+    if "--port" in sys.argv:
+        port = int(sys.argv[sys.argv.index("--port") + 1])
+    server.run(port=port)
+
 def run_gui():
     # gui.py already does root.mainloop()
     import gui  # noqa: F401
@@ -34,5 +46,7 @@ def run_gui():
 if __name__ == "__main__":
     if "--gui" in sys.argv:
         run_gui()
+    elif "--serve" in sys.argv:
+        run_server()
     else:
         run_cli()
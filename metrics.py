@@ -0,0 +1,249 @@
+# File: metrics.py
+"""
+In-process tracing and metrics with Prometheus text export (standard library only).
+
+    with metrics.span("form_fill"):        # time a block
+        ...
+
+    @metrics.traced("nlp_parse")            # time every call
+    def parse(...): ...
+
+Every span feeds the trainbot_span_duration_seconds histogram, labelled by span
+name. Spans nest per thread. When the outermost span of a thread finishes, its
+span tree is logged as one JSON line at DEBUG level on the "trace" logger. That
+logging is skipped entirely unless it is enabled.
+
+    with metrics.trace("sess-1:turn-3"):   # tag the root spans logged inside
+        ...
+
+The trace id lives in a context variable, so work handed to another thread
+under contextvars.copy_context() (as SearchScheduler does) logs its span trees
+with the id of the turn that started it.
+
+render() returns the Prometheus text exposition of everything registered. The
+server exposes it on GET /metrics, and write_textfile() writes it to a file for
+node_exporter's textfile collector. Cheap snapshot values such as cache sizes
+are pulled in at render time through register_collector(), so they cost
+nothing per request.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+PREFIX = "trainbot_"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+trace_logger = logging.getLogger("trace")
+
+
+def _label_str(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_str(self.labelnames, key)} {value}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels."""
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labelnames, key)} {series[-1]}"
+            yield f"{self.name}_count{_label_str(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, doc: str, labelnames: tuple, **kwargs):
+        name = PREFIX + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, doc, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, doc: str, labelnames: tuple = ()) -> Counter:
+        return self._get(Counter, name + "_total", doc, labelnames)
+
+    def gauge(self, name: str, doc: str, labelnames: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, doc, labelnames)
+
+    def histogram(self, name: str, doc: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, doc, labelnames, buckets=buckets)
+
+    def register_collector(self, fn):
+        """fn() is called on every render(), typically to set gauges from stats()."""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                fn()
+            except Exception:
+                logging.getLogger(__name__).exception("Metrics collector failed")
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+register_collector = REGISTRY.register_collector
+render = REGISTRY.render
+
+SPAN_SECONDS = histogram("span_duration_seconds", "Time spent in each traced span.", ("span",))
+SPAN_ERRORS = counter("span_errors", "Spans that exited with an exception.", ("span",))
+
+_local = threading.local()
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+@contextmanager
+def trace(trace_id: str):
+    """Tag root span trees logged inside the block (and in copied contexts) with trace_id."""
+    token = _trace_id.set(trace_id)
+    try:
+        yield
+    finally:
+        _trace_id.reset(token)
+
+
+class span:
+    """Context manager timing a block as a named span."""
+    __slots__ = ("name", "start", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.children = [] if trace_logger.isEnabledFor(logging.DEBUG) else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        SPAN_SECONDS.observe(elapsed, span=self.name)
+        if exc_type is not None:
+            SPAN_ERRORS.inc(span=self.name)
+        if self.children is not None:
+            node = {"span": self.name, "ms": round(elapsed * 1000, 3)}
+            if self.children:
+                node["children"] = self.children
+            if stack and stack[-1].children is not None:
+                stack[-1].children.append(node)
+            elif not stack:
+                trace_id = _trace_id.get()
+                if trace_id is not None:
+                    node["trace"] = trace_id
+                trace_logger.debug(json.dumps(node))
+        return False
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_textfile(path):
+    """Write render() to path atomically (for node_exporter's textfile collector)."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render())
+    os.replace(tmp, path)
@@ -28,21 +28,142 @@ def load_station_dict(csv_path: Path) -> dict[str, str]:
 # File: nlp_module.py
 import re
 import logging
-import spacy
-from spacy.matcher import PhraseMatcher
-from dateparser.search import search_dates
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from pathlib import Path
 from stations_loader import load_station_dict
-import difflib
+from station_search import Gazetteer, TrigramIndex
+import date_grammar
+import metrics
+from station_registry import StationRegistry, get_registry
+
+# Components the station matcher never uses; excluding them means they are not
+# even loaded from disk.
+_LEAN_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+_shared_lock = threading.RLock()
+_pipelines = {}
+_processors = {}
+
+
+def load_pipeline(lean: bool = True):
+    """
+    Return the process-wide spaCy pipeline, loading it on first use.
+    The lean pipeline keeps only the tokenizer, which is all the PhraseMatcher needs.
+    """
+    import spacy
+    with _shared_lock:
+        nlp = _pipelines.get(lean)
+        if nlp is None:
+            nlp = spacy.load("en_core_web_sm", exclude=_LEAN_EXCLUDE if lean else [])
+            _pipelines[lean] = nlp
+        return nlp
+
+
+def get_processor(stations_csv_path: str = None) -> "NLPProcessor":
+    """
+    Return a shared NLPProcessor for the given stations CSV, building it once per process.
+    Station tables and indexes come from the shared StationRegistry.
+    """
+    key = str(Path(stations_csv_path).resolve()) if stations_csv_path else None
+    with _shared_lock:
+        proc = _processors.get(key)
+        if proc is None:
+            if key:
+                proc = NLPProcessor(registry=get_registry(stations_csv=key))
+            else:
+                proc = NLPProcessor()
+            # Lets parse_many rebuild the same processor in worker processes
+            proc.source = (key,)
+            _processors[key] = proc
+        return proc
+
+
+def _parse_chunk(source: tuple, texts: list[str], today: date) -> list[dict]:
+    """parse_many worker: full parses of texts with the shared processor for source."""
+    proc = get_processor(*source)
+    dates = date_grammar.find_datetimes_many(texts, today)
+    return [proc._parse(text, None, found) for text, found in zip(texts, dates)]
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parse results keyed by normalized text.
+    Results carrying date/time slots are stamped with the day they were parsed,
+    since "tomorrow" means something else after midnight; they miss once the
+    calendar day changes. Stored and returned results are copies.
+    """
+    _DATED = ("date", "time", "return_date", "return_time")
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _copy(result: dict) -> dict:
+        slots = {k: list(v) if isinstance(v, list) else v for k, v in result["slots"].items()}
+        return {**result, "slots": slots}
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                day, result = entry
+                if day is None or day == date.today():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._copy(result)
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: dict):
+        dated = any(k in result["slots"] for k in self._DATED)
+        entry = (date.today() if dated else None, self._copy(result))
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
 
 class NLPProcessor:
     """
     NLP Processor for intent classification, entity extraction, and slot filling.
     Uses a full station list with fuzzy fallback for user input.
+    Stations are found with an Aho-Corasick gazetteer by default, so spaCy is
+    only loaded when use_spacy=True asks for the PhraseMatcher instead.
     """
-    def __init__(self, station_dict: dict[str,str]=None, stations_csv_path: str=None):
+    # Slots each extractor can fill, for partial parses
+    _DATETIME_SLOTS = {'date','time','return_date','return_time'}
+    _STATION_SLOTS = {'departure','destination','stations','current_station'}
+
+    def __init__(self, station_dict: dict[str,str]=None, stations_csv_path: str=None,
+                 lean: bool=True, use_spacy: bool=False, cache_size: int=1024,
+                 gazetteer: Gazetteer=None, fuzzy: TrigramIndex=None,
+                 registry: StationRegistry=None):
         self.logger = logging.getLogger(__name__)
-        self.nlp = spacy.load("en_core_web_sm")
+        self.cache = ParseCache(cache_size) if cache_size else None
+        self.registry = registry
+        # get_processor() arguments for this instance, when it came from there
+        self.source = None
+        if registry is not None:
+            station_dict = registry.stations
+            gazetteer = gazetteer or registry.gazetteer
+            fuzzy = fuzzy or registry.fuzzy
         if station_dict is None and stations_csv_path:
             station_dict = load_station_dict(Path(stations_csv_path))
         self.stations = station_dict or {
@@ -51,35 +172,70 @@ class NLPProcessor:
             "oxford": "OXF",
             "ipswich": "IPS"
         }
-        # PhraseMatcher setup
-        self.matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
-        patterns = [self.nlp.make_doc(name) for name in self.stations.keys()]
-        self.matcher.add("STATION", patterns)
+        # Station matcher: gazetteer, or spaCy PhraseMatcher if requested
+        self.nlp = None
+        self.matcher = None
+        self.gazetteer = None
+        if use_spacy:
+            from spacy.matcher import PhraseMatcher
+            self.nlp = load_pipeline(lean)
+            self.matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+            patterns = [self.nlp.make_doc(name) for name in self.stations.keys()]
+            self.matcher.add("STATION", patterns)
+        else:
+            self.gazetteer = gazetteer or Gazetteer(self.stations.keys())
+        # Trigram index for typo-tolerant lookups
+        self.fuzzy = fuzzy or TrigramIndex(self.stations.keys())
         # Intent keywords
         self.intent_keywords = {
             "find_ticket": ["ticket","price","journey","cheapest","book","train","travel","trip","fare"],
             "predict_delay": ["delay","late","arrival","predict","delayed"]
         }
+        self.compile_intents()
         # Precompile regex
         self._pat_return = re.compile(r"\b(return|back)\b", re.IGNORECASE)
         self._pat_single = re.compile(r"\b(single|one[- ]way)\b", re.IGNORECASE)
         self._pat_train  = re.compile(r"train\s*(\d+)", re.IGNORECASE)
         self._pat_delay  = re.compile(r"(\d+)\s*minutes?", re.IGNORECASE)
+        # Load dateparser's English data now rather than on the first date-like message
+        date_grammar.preload()
+
+    def compile_intents(self):
+        """
+        Compile intent_keywords into one substring automaton; call again after
+        changing the keywords.
+        """
+        self._intents = list(self.intent_keywords)
+        self._keyword_intents = {}
+        for i, kws in enumerate(self.intent_keywords.values()):
+            for kw in kws:
+                self._keyword_intents.setdefault(kw.lower(), []).append(i)
+        self._intent_matcher = Gazetteer(self._keyword_intents, whole_words=False)
+        self._intent_total = sum(len(kws) for kws in self.intent_keywords.values())
 
     def predict_intent(self, text: str) -> tuple[str,float]:
-        txt = text.lower()
-        scores = { intent: sum(1 for kw in kws if kw in txt) for intent,kws in self.intent_keywords.items() }
-        best_intent, best_score = max(scores.items(), key=lambda x: x[1])
-        total = sum(len(kws) for kws in self.intent_keywords.values())
-        confidence = best_score/total if total else 0.0
+        # Each keyword counts once if it occurs anywhere, as a substring
+        hits = {name for _,_,name in self._intent_matcher.find(text)}
+        scores = [0]*len(self._intents)
+        for kw in hits:
+            for i in self._keyword_intents[kw]:
+                scores[i] += 1
+        best = max(range(len(scores)), key=scores.__getitem__)
+        best_score = scores[best]
+        confidence = best_score/self._intent_total if self._intent_total else 0.0
         if best_score == 0:
             return "unsupported", confidence
-        return best_intent, confidence
+        return self._intents[best], confidence
+
+    def predict_intents(self, texts) -> list[tuple[str,float]]:
+        """predict_intent over a batch of texts."""
+        return [self.predict_intent(text) for text in texts]
 
     def extract_datetimes(self, text: str) -> dict:
+        return self._datetime_slots(date_grammar.find_datetimes(text))
+
+    def _datetime_slots(self, dates: list) -> dict:
         slots = {}
-        matches = search_dates(text, settings={"PREFER_DATES_FROM":"future"}) or []
-        dates = [dt for _,dt in matches]
         if dates:
             first = dates[0]
             slots['date'] = first.date()
@@ -92,10 +248,21 @@ class NLPProcessor:
                     slots['return_time'] = second.time()
         return slots
 
+    def _make_doc(self, text: str):
+        # Only tokens are needed for the LOWER PhraseMatcher
+        return self.nlp.make_doc(text) if self.matcher is not None else None
+
+    def _station_names(self, text: str, doc) -> list[str]:
+        """Matched station names (lowercased) in matcher order: by start, then end."""
+        if self.matcher is None:
+            return [name for _,_,name in self.gazetteer.find(text)]
+        return [doc[start:end].text.lower() for _,start,end in self.matcher(doc)]
+
     def extract_stations(self, text: str, intent: str) -> dict:
-        doc = self.nlp(text)
-        matches = self.matcher(doc)
-        found = [doc[start:end].text.lower() for _,start,end in matches]
+        return self._station_slots(text, self._make_doc(text), intent)
+
+    def _station_slots(self, text: str, doc, intent: str) -> dict:
+        found = self._station_names(text, doc)
         unique = list(dict.fromkeys(found))
         slots = {}
         if intent=='predict_delay':
@@ -117,11 +284,15 @@ class NLPProcessor:
                 slots['stations']=[self.stations[unique[0]]]
         # fuzzy fallback
         if not slots and len(text)<40:
-            cand=difflib.get_close_matches(text.lower(), self.stations.keys(), n=1, cutoff=0.8)
+            cand=self.fuzzy.best(text.lower(), cutoff=0.8)
             if cand:
-                slots['stations']=[self.stations[cand[0]]]
+                slots['stations']=[self.stations[cand]]
         return slots
 
+    def did_you_mean(self, text: str, k: int = 3, cutoff: float = 0.6) -> list[str]:
+        """Closest station names to text, best first, for "did you mean" prompts."""
+        return [name for name,_ in self.fuzzy.top_k(text, k=k, cutoff=cutoff)]
+
     def extract_trip_type(self, text: str) -> str|None:
         if self._pat_return.search(text): return 'return'
         if self._pat_single.search(text): return 'single'
@@ -135,11 +306,94 @@ class NLPProcessor:
         if dm: slots['delay_minutes']=int(dm.group(1))
         return slots
 
-    def parse(self, text: str) -> dict:
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case- and whitespace-folded form of text; parse results depend only on this."""
+        return " ".join(text.split()).lower()
+
+    @metrics.traced("nlp_parse")
+    def parse(self, text: str, expect=None) -> dict:
+        """
+        Parse text into intent, confidence and slots.
+        expect names the slots the dialogue is waiting for (e.g. ("trip_type",));
+        only the matching extractors run, and the full pipeline is used when they
+        find nothing. Results are cached under the text plus the expected slots.
+        """
+        text = self.normalize(text)
+        # Partial parses differ from full ones, so they are cached per expected-slot set
+        key = text + "\0" + ",".join(sorted(expect)) if expect else text
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        result = self._parse_expected(text, set(expect)) if expect else None
+        if result is None:
+            result = self._parse(text, self._make_doc(text), date_grammar.find_datetimes(text))
+            if self.cache is not None and key != text:
+                self.cache.put(text, result)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def parse_many(self, texts, batch_size: int = 256, n_process: int = 1) -> list[dict]:
+        """
+        Parse a batch of texts, returning the same results as parse() on each.
+
+        With n_process > 1 the uncached texts are split into batch_size chunks and
+        parsed (date grammar, dateparser fallback, matching) in a pool of worker
+        processes, each with its own shared processor; this needs a processor from
+        get_processor(). With the spaCy matcher, docs are instead streamed through
+        nlp.pipe, which only spreads tokenization across processes.
+        Fresh results are added to the parse cache, so replaying logs pre-warms it.
+        """
+        texts = [self.normalize(t) for t in texts]
+        results = [self.cache.get(t) if self.cache is not None else None for t in texts]
+        todo = [i for i, r in enumerate(results) if r is None]
+        pending = [texts[i] for i in todo]
+        if n_process > 1 and self.matcher is None and self.source is not None and len(pending) > batch_size:
+            parsed = self._parse_parallel(pending, batch_size, n_process)
+        else:
+            dates = date_grammar.find_datetimes_many(pending)
+            if self.matcher is not None:
+                docs = self.nlp.pipe(pending, batch_size=batch_size, n_process=n_process)
+            else:
+                docs = [None] * len(pending)
+            parsed = (self._parse(text, doc, found) for text, doc, found in zip(pending, docs, dates))
+        for i, text, result in zip(todo, pending, parsed):
+            results[i] = result
+            if self.cache is not None:
+                self.cache.put(text, result)
+        return results
+
+    def _parse_parallel(self, texts: list[str], batch_size: int, n_process: int) -> list[dict]:
+        chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        today = date.today()
+        with ProcessPoolExecutor(max_workers=min(n_process, len(chunks))) as pool:
+            parts = pool.map(_parse_chunk, [self.source] * len(chunks), chunks, [today] * len(chunks))
+            return [result for part in parts for result in part]
+
+    def _parse_expected(self, text: str, expect: set) -> dict | None:
+        intent,conf=self.predict_intent(text)
+        slots={}
+        if 'trip_type' in expect:
+            tp=self.extract_trip_type(text)
+            if tp: slots['trip_type']=tp
+        if expect & self._DATETIME_SLOTS:
+            # A lone time comes back dated today; only take the slots that were asked for
+            # (a time given alongside an asked-for date is explicit, so it is kept too)
+            wanted = set(expect) | ({'time'} if 'date' in expect else set())
+            slots.update({k: v for k, v in self.extract_datetimes(text).items() if k in wanted})
+        if expect & self._STATION_SLOTS:
+            slots.update(self.extract_stations(text,intent))
+        if not slots:
+            return None
+        return {'intent':intent,'confidence':conf,'slots':slots}
+
+    def _parse(self, text: str, doc, dates: list) -> dict:
         intent,conf=self.predict_intent(text)
         slots={}
-        slots.update(self.extract_datetimes(text))
-        slots.update(self.extract_stations(text,intent))
+        slots.update(self._datetime_slots(dates))
+        slots.update(self._station_slots(text, doc, intent))
         tp=self.extract_trip_type(text)
         if tp: slots['trip_type']=tp
         if intent=='predict_delay': slots.update(self.extract_train_info(text))
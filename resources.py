@@ -0,0 +1,72 @@
+# File: resources.py
+"""
+Process-wide warm resources that every Chatbot borrows: the NLP processor,
+station registry, search scheduler, ticket cache and single-flight table.
+
+They are built once, on first use, so creating or resetting a Chatbot never
+reloads models or station data or starts another thread pool.
+"""
+import logging
+import threading
+
+import metrics
+from nlp_module import get_processor
+from station_cache import STATIONS_CSV
+from ticket_search import SearchScheduler, SingleFlight, TicketCache
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_resources = None
+
+
+class Resources:
+    """The heavy, shareable half of a Chatbot. All members are thread-safe."""
+    def __init__(self, stations_csv=STATIONS_CSV, scheduler: SearchScheduler = None,
+                 ticket_cache: TicketCache = None):
+        self.nlp = get_processor(stations_csv_path=stations_csv)
+        self.registry = self.nlp.registry
+        self.scheduler = scheduler or SearchScheduler()
+        self.ticket_cache = ticket_cache or TicketCache()
+        # Identical searches running at the same time share one browser
+        self.single_flight = SingleFlight()
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        """Copy cache, queue and coalescing stats into gauges at scrape time."""
+        search = self.scheduler.stats()
+        for name, doc in (("queue_depth", "Searches waiting for a worker."),
+                          ("running", "Searches currently running."),
+                          ("submitted", "Searches admitted since start."),
+                          ("rejected", "Searches turned away because the queue was full.")):
+            metrics.gauge(f"search_{name}", doc).set(search[name])
+        metrics.gauge("search_expected_wait_seconds",
+                      "Estimated wait before a search submitted now would start.").set(search["expected_wait_s"])
+        caches = metrics.gauge("cache_requests", "Cache lookups by cache and result.", ("cache", "result"))
+        for cache_name, cache in (("parse", self.nlp.cache), ("ticket", self.ticket_cache)):
+            if cache is not None:
+                caches.set(cache.hits, cache=cache_name, result="hit")
+                caches.set(cache.misses, cache=cache_name, result="miss")
+        flights = self.single_flight.stats()
+        coalesce = metrics.gauge("single_flight_searches", "Searches started or coalesced.", ("kind",))
+        coalesce.set(flights["started"], kind="started")
+        coalesce.set(flights["coalesced"], kind="coalesced")
+
+    def stats(self) -> dict:
+        return {"parse_cache": self.nlp.cache.stats() if self.nlp.cache else None,
+                "ticket_cache": self.ticket_cache.stats(),
+                "single_flight": self.single_flight.stats(),
+                "scheduler": self.scheduler.stats()}
+
+    def shutdown(self, wait: bool = False):
+        self.scheduler.shutdown(wait=wait, cancel_futures=True)
+
+
+def get_resources() -> Resources:
+    """Return the process-wide Resources, building them on first call."""
+    global _resources
+    with _lock:
+        if _resources is None:
+            logger.info("Loading shared chatbot resources")
+            _resources = Resources()
+        return _resources
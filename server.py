@@ -0,0 +1,312 @@
+# File: server.py
+"""
+Asyncio HTTP/WebSocket front end for the chatbot (standard library only).
+
+Endpoints (localhost by default):
+    POST /respond            {"session": "...", "text": "..."} -> {"session", "reply"}
+    GET  /events?session=ID  long-poll for async ticket results -> {"job", "reply"} or 204
+    GET  /health             -> {"status": "ok", ...}
+    GET  /metrics            Prometheus text exposition (see metrics.py)
+    GET  /ws?session=ID      WebSocket; send text messages, receive JSON replies and
+                             ticket results as they finish
+
+NLP and dialogue logic run on a worker thread pool so the event loop only does
+I/O; ticket searches run on the bot's search scheduler and are pushed back to the
+session when done.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import signal
+import struct
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+import trainlinescraper
+from sessions import SessionManager
+
+logger = logging.getLogger(__name__)
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class ChatServer:
+    """
+    One process, many sessions: a SessionManager behind an asyncio server.
+    """
+    MAX_BODY = 16 * 1024
+    MAX_MESSAGE = 500
+    # Undelivered async results kept per session
+    MAX_OUTBOX = 20
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, workers: int = 8,
+                 request_timeout: float = 30.0, poll_timeout: float = 25.0):
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self.poll_timeout = poll_timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nlp")
+        self.sessions = SessionManager(on_result=self._on_result, on_evict=self._on_evict)
+        self._outbox = {}
+        self._loop = None
+        self._server = None
+        self._tasks = set()
+        self._closing = asyncio.Event()
+
+    # ---- async ticket results -------------------------------------------------
+
+    def _on_result(self, session_id: str, job_id: str, reply: str):
+        # Called on a search worker thread
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._push, session_id, {"job": job_id, "reply": reply})
+
+    def _on_evict(self, session_id: str):
+        # Called on whichever thread evicted the session
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._outbox.pop, session_id, None)
+
+    def _push(self, session_id: str, event: dict):
+        if session_id not in self.sessions:
+            return  # evicted while its search ran
+        try:
+            self._queue(session_id).put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping result for session {session_id}: outbox full")
+
+    def _queue(self, session_id: str) -> asyncio.Queue:
+        # Only for live sessions: callers check membership, and eviction drops the queue
+        q = self._outbox.get(session_id)
+        if q is None:
+            q = self._outbox[session_id] = asyncio.Queue(maxsize=self.MAX_OUTBOX)
+        return q
+
+    async def respond(self, session_id: str, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(self.pool, self.sessions.respond, session_id, text)
+        return await asyncio.wait_for(call, timeout=self.request_timeout)
+
+    # ---- HTTP -----------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.request_timeout)
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(reader, writer, headers, query)
+                return
+            length = int(headers.get("content-length", 0) or 0)
+            if length > self.MAX_BODY:
+                await self._send(writer, 413, {"error": "body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+            status, payload = await self._route(method, url.path, query, body)
+            await self._send(writer, status, payload)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # shutdown gave up on this connection; just close it
+        except asyncio.TimeoutError:
+            await self._send(writer, 504, {"error": "request timed out"})
+        except ValueError:
+            await self._send(writer, 400, {"error": "malformed request"})
+        except Exception:
+            logger.exception("Unhandled error serving request")
+            await self._send(writer, 500, {"error": "internal error"})
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _route(self, method: str, path: str, query: dict, body: bytes):
+        if self._closing.is_set():
+            return 503, {"error": "shutting down"}
+        if path == "/metrics":
+            return 200, metrics.render()
+        if path == "/health":
+            return 200, {"status": "ok", **self.sessions.stats(),
+                         "search": self.sessions.bot.scheduler.stats()}
+        if path == "/respond":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            data = json.loads(body or b"{}")
+            if not isinstance(data, dict):
+                return 400, {"error": "body must be a JSON object"}
+            text = str(data.get("text", "")).strip()
+            if not text or len(text) > self.MAX_MESSAGE:
+                return 400, {"error": f"text must be 1-{self.MAX_MESSAGE} characters"}
+            session_id = str(data.get("session") or uuid.uuid4().hex)
+            reply = await self.respond(session_id, text)
+            return 200, {"session": session_id, "reply": reply}
+        if path == "/events":
+            session_id = query.get("session")
+            if not session_id:
+                return 400, {"error": "session is required"}
+            if session_id not in self.sessions:
+                return 404, {"error": "unknown session"}
+            try:
+                event = await asyncio.wait_for(self._queue(session_id).get(), self.poll_timeout)
+            except asyncio.TimeoutError:
+                return 204, None
+            return 200, event
+        return 404, {"error": "not found"}
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, payload):
+        # str payloads are plain text (the metrics page), anything else JSON
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body = b"" if payload is None else json.dumps(payload).encode()
+            content_type = "application/json"
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # ---- WebSocket ------------------------------------------------------------
+
+    async def _websocket(self, reader, writer, headers: dict, query: dict):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send(writer, 400, {"error": "missing Sec-WebSocket-Key"})
+            return
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        session_id = query.get("session") or uuid.uuid4().hex
+        self.sessions.get(session_id)  # register it so results can be queued for it
+        await self._ws_send(writer, {"session": session_id,
+                                     "reply": "Hello! How can I help you today?"})
+        pusher = asyncio.create_task(self._ws_push(writer, session_id))
+        try:
+            while not self._closing.is_set():
+                opcode, payload = await self._ws_read(reader)
+                if opcode == 0x8:  # close
+                    writer.write(b"\x88\x00")
+                    break
+                if opcode == 0x9:  # ping
+                    writer.write(self._ws_frame(payload, opcode=0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                text = payload.decode("utf-8", "replace").strip()
+                if not text or len(text) > self.MAX_MESSAGE:
+                    await self._ws_send(writer, {"error": f"text must be 1-{self.MAX_MESSAGE} characters"})
+                    continue
+                try:
+                    reply = await self.respond(session_id, text)
+                except asyncio.TimeoutError:
+                    reply = "Sorry, that took too long. Please try again."
+                await self._ws_send(writer, {"session": session_id, "reply": reply})
+        finally:
+            pusher.cancel()
+            self._outbox.pop(session_id, None)
+
+    async def _ws_push(self, writer, session_id: str):
+        queue = self._queue(session_id)
+        while True:
+            event = await queue.get()
+            await self._ws_send(writer, event)
+
+    @staticmethod
+    async def _ws_read(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        b1, b2 = await reader.readexactly(2)
+        opcode = b1 & 0x0F
+        length = b2 & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > ChatServer.MAX_BODY:
+            raise ConnectionError("WebSocket frame too large")
+        mask = await reader.readexactly(4) if b2 & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+    async def _ws_send(self, writer, message: dict):
+        writer.write(self._ws_frame(json.dumps(message).encode()))
+        await writer.drain()
+
+    # ---- lifecycle ------------------------------------------------------------
+
+    async def serve(self, grace: float = 10.0):
+        """Run until SIGINT/SIGTERM, then drain in-flight requests for up to grace seconds."""
+        self._loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # e.g. Windows; Ctrl+C still raises KeyboardInterrupt
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Start browsers now so the first search doesn't pay for the launch
+        trainlinescraper.get_pool().prewarm()
+        logger.info(f"Chat server listening on http://{self.host}:{self.port}")
+        print(f"Serving on http://{self.host}:{self.port} (Ctrl+C to stop)")
+        try:
+            await stop.wait()
+        finally:
+            await self.shutdown(grace)
+
+    async def shutdown(self, grace: float = 10.0):
+        logger.info("Shutting down chat server")
+        self._closing.set()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=grace)
+            for task in pending:
+                task.cancel()
+        self.sessions.bot.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.sessions.bot.resources.shutdown()
+
+
+def run(host: str = "127.0.0.1", port: int = 8765):
+    try:
+        asyncio.run(ChatServer(host, port).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    run()
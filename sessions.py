@@ -0,0 +1,91 @@
+# File: sessions.py
+"""
+Many concurrent conversations in one process.
+
+SessionManager maps session ids to small DialogueState objects and routes every
+message through one shared Chatbot, so the NLP pipeline, station data and
+search scheduler exist once no matter how many users are connected.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from chatbot_logic import Chatbot, DialogueState
+
+
+class SessionManager:
+    """
+    Thread-safe session store with LRU and idle-TTL eviction.
+
+    respond(session_id, text) may be called from any thread; messages for the
+    same session are serialized, different sessions run in parallel.
+    """
+    def __init__(self, bot: Chatbot = None, max_sessions: int = 10000,
+                 ttl: float = 30 * 60, on_result=None, on_evict=None):
+        self.logger = logging.getLogger(__name__)
+        # on_result(session_id, job_id, response) for async ticket searches
+        self.on_result = on_result
+        # on_evict(session_id) when a session expires, is pushed out or is reset
+        self.on_evict = on_evict
+        self.bot = bot or Chatbot(async_search=on_result is not None,
+                                  on_result=self._deliver if on_result else None)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _evict(self, now: float):
+        # Oldest-used sessions sit at the front, so expiry stops at the first live one
+        while self._sessions:
+            sid, st = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - st.last_seen < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            if st.jobs or st.prefetch:
+                self.bot.cancel(state=st)
+            if self.on_evict is not None:
+                self.on_evict(sid)
+            self.logger.debug(f"Evicted session {sid}")
+
+    def get(self, session_id: str) -> DialogueState:
+        """Return the state for session_id, creating it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            st = self._sessions.get(session_id)
+            if st is None:
+                st = DialogueState(session_id)
+                self._sessions[session_id] = st
+            else:
+                self._sessions.move_to_end(session_id)
+            st.last_seen = now
+            self._evict(now)
+        return st
+
+    def respond(self, session_id: str, text: str) -> str:
+        st = self.get(session_id)
+        with st.lock:
+            st.touch()
+            return self.bot.respond(text, state=st)
+
+    def reset(self, session_id: str):
+        """Forget a session and cancel its pending searches."""
+        with self._lock:
+            st = self._sessions.pop(session_id, None)
+        if st is not None and (st.jobs or st.prefetch):
+            self.bot.cancel(state=st)
+        if st is not None and self.on_evict is not None:
+            self.on_evict(session_id)
+
+    def _deliver(self, job_id: str, response: str):
+        # Job ids of session-bound searches are "<session_id>:job-<n>"
+        self.on_result(job_id.rpartition(":")[0], job_id, response)
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._sessions), "max_sessions": self.max_sessions, "ttl": self.ttl}
@@ -0,0 +1,106 @@
+# File: station_cache.py
+"""
+Prebuilt station gazetteer artifact.
+
+Parsing the station CSVs and building the matcher indexes costs far more than
+loading them back, so the results are pickled once into .cache/ and read with a
+single bulk read on later starts. The artifact name carries a hash of the CSV
+paths and a hash of their contents, so editing either file triggers a rebuild
+automatically, and artifacts for other CSV paths are left alone.
+
+Build (or rebuild) ahead of time with:
+    python station_cache.py
+"""
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+
+from stations_loader import load_station_dict, load_station_data
+from station_search import Gazetteer, TrigramIndex
+
+ROOT = Path(__file__).resolve().parent
+STATIONS_CSV = ROOT / "Task2" / "data" / "stations.csv"
+CODES_CSV = ROOT / "station_codes.csv"
+CACHE_DIR = ROOT / ".cache"
+# Bump when the artifact layout or the index classes change
+FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(*paths) -> str:
+    h = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for path in paths:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _source_key(*paths) -> str:
+    h = hashlib.sha256("\0".join(str(Path(p).resolve()) for p in paths).encode())
+    return h.hexdigest()[:8]
+
+
+def build_tables(stations_csv=STATIONS_CSV, codes_csv=CODES_CSV) -> dict:
+    """
+    Parse both CSVs and build the matcher indexes.
+
+    Returns:
+        tables: Dict with 'stations' (name -> code), 'crs' (CRS -> tiploc/name),
+                'gazetteer' and 'fuzzy' indexes over the station names.
+    """
+    stations = load_station_dict(Path(stations_csv))
+    return {
+        "stations": stations,
+        "crs": load_station_data(codes_csv),
+        "gazetteer": Gazetteer(stations.keys()),
+        "fuzzy": TrigramIndex(stations.keys()),
+    }
+
+
+def artifact_path(stations_csv=STATIONS_CSV, codes_csv=CODES_CSV, cache_dir=CACHE_DIR) -> Path:
+    source = _source_key(stations_csv, codes_csv)
+    return Path(cache_dir) / f"station_tables-{source}-{_digest(stations_csv, codes_csv)}.pkl"
+
+
+def load_tables(stations_csv=STATIONS_CSV, codes_csv=CODES_CSV, cache_dir=CACHE_DIR,
+                rebuild: bool = False) -> dict:
+    """
+    Load the station tables from the artifact, building and saving it first if it
+    is missing, stale or rebuild is set. Falls back to building in memory when
+    the cache directory cannot be written.
+    """
+    path = artifact_path(stations_csv, codes_csv, cache_dir)
+    if path.exists() and not rebuild:
+        try:
+            return pickle.loads(path.read_bytes())
+        except Exception:
+            logger.warning("Station artifact %s unreadable; rebuilding", path)
+
+    tables = build_tables(stations_csv, codes_csv)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, path)
+        # Drop artifacts built from older versions of these same CSVs
+        source = _source_key(stations_csv, codes_csv)
+        for old in path.parent.glob(f"station_tables-{source}-*.pkl"):
+            if old != path:
+                old.unlink(missing_ok=True)
+        logger.info("Built station artifact %s", path)
+    except OSError:
+        logger.warning("Could not write station artifact %s", path, exc_info=True)
+    return tables
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    load_tables(rebuild=True)
+    print(f"Built {artifact_path()} in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    tables = load_tables()
+    print(f"Loaded {len(tables['stations'])} names, {len(tables['crs'])} CRS codes "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms")
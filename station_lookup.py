@@ -1,26 +1,26 @@
-import csv
-
-# Load once at startup
-def load_station_data(csv_path='station_codes.csv'):
-    data = {}
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            name = row['Description'].strip().lower()
-            crs = row['CRS'].strip().upper()
-            tiploc = row['Tiploc'].strip().upper()  # corrected!
-            if crs and tiploc:
-                data[crs] = {'tiploc': tiploc, 'name': name}
-    return data
-
-# Example usage
-station_data = load_station_data()
+from station_registry import get_registry
+# Re-exported for existing callers; the parsing lives in stations_loader
+from stations_loader import load_station_data  # noqa: F401
+
+
+def preload():
+    """Load the station registry now, e.g. during server warmup, instead of on first lookup."""
+    return get_registry()
+
+
+def __getattr__(name):
+    # Keep `station_lookup.station_data` working for older callers; it is rebuilt
+    # from the shared registry on each access rather than held as a second copy
+    if name == "station_data":
+        return get_registry().crs_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_tiploc_from_crs(crs_code):
-    return station_data.get(crs_code.upper(), {}).get('tiploc')
+    return get_registry().tiploc_from_crs(crs_code)
 
 def get_name_from_crs(crs_code):
-    return station_data.get(crs_code.upper(), {}).get('name')
+    return get_registry().name_from_crs(crs_code)
 
 if __name__ == '__main__':
     print(get_tiploc_from_crs('NRW'))   # Norwich
@@ -0,0 +1,105 @@
+# File: station_registry.py
+"""
+One place for station data: name variants -> codes from stations.csv and the
+CRS/TIPLOC table from station_codes.csv, loaded once per process.
+"""
+import sys
+import threading
+from pathlib import Path
+
+import station_cache
+from station_search import PrefixIndex
+
+_registry_lock = threading.Lock()
+_registries = {}
+
+
+class StationRegistry:
+    """
+    Station names, codes and CRS/TIPLOC rows in interned, array-backed tables.
+    Every lookup is a single dict probe into a row index.
+    """
+    def __init__(self, stations: dict[str, str], crs_table: dict[str, dict],
+                 gazetteer=None, fuzzy=None):
+        # Name variants -> code, with codes interned so repeats share one string
+        self.stations = {sys.intern(name): sys.intern(code) for name, code in stations.items()}
+        self.gazetteer = gazetteer
+        self.fuzzy = fuzzy
+
+        self.prefix = PrefixIndex(self.stations)
+
+        # Display name per code: first variant seen, tidied as the chatbot shows it
+        self._display = {}
+        for name, code in self.stations.items():
+            if code not in self._display:
+                self._display[code] = name.title().replace(" Rail Station", "")
+
+        # CRS table as parallel columns plus row indexes in both directions
+        self._crs = []
+        self._tiploc = []
+        self._crs_name = []
+        self._crs_row = {}
+        self._tiploc_row = {}
+        for crs, row in crs_table.items():
+            idx = len(self._crs)
+            self._crs.append(sys.intern(crs))
+            self._tiploc.append(sys.intern(row["tiploc"]))
+            self._crs_name.append(row["name"])
+            self._crs_row[crs] = idx
+            self._tiploc_row.setdefault(row["tiploc"], idx)
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> "StationRegistry":
+        return cls(tables["stations"], tables["crs"], tables.get("gazetteer"), tables.get("fuzzy"))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def code_for(self, name: str) -> str | None:
+        return self.stations.get(name.lower())
+
+    def display_name(self, code: str) -> str:
+        """Readable station name for a code, or the code itself if unknown."""
+        return self._display.get(code, code)
+
+    def suggest(self, prefix: str, k: int = 5) -> list[tuple[str, str]]:
+        """Top-k (name, code) typeahead suggestions for a partly typed station name."""
+        return self.prefix.suggest(prefix, k)
+
+    def tiploc_from_crs(self, crs_code: str) -> str | None:
+        idx = self._crs_row.get(crs_code.upper())
+        return None if idx is None else self._tiploc[idx]
+
+    def name_from_crs(self, crs_code: str) -> str | None:
+        idx = self._crs_row.get(crs_code.upper())
+        return None if idx is None else self._crs_name[idx]
+
+    def crs_table(self) -> dict[str, dict]:
+        """The CRS table rebuilt as {crs: {'tiploc': ..., 'name': ...}}, for older callers."""
+        return {crs: {"tiploc": self._tiploc[idx], "name": self._crs_name[idx]}
+                for crs, idx in self._crs_row.items()}
+
+    def crs_from_tiploc(self, tiploc: str) -> str | None:
+        idx = self._tiploc_row.get(tiploc.upper())
+        return None if idx is None else self._crs[idx]
+
+
+def get_registry(stations_csv=station_cache.STATIONS_CSV,
+                 codes_csv=station_cache.CODES_CSV) -> StationRegistry:
+    """
+    Return the process-wide StationRegistry for these CSVs, loading it from the
+    prebuilt artifact on first use.
+    """
+    key = (str(Path(stations_csv).resolve()), str(Path(codes_csv).resolve()))
+    with _registry_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            tables = station_cache.load_tables(stations_csv=stations_csv, codes_csv=codes_csv)
+            registry = StationRegistry.from_tables(tables)
+            _registries[key] = registry
+        return registry
+
+
+def suggest(prefix: str, k: int = 5) -> list[tuple[str, str]]:
+    """Typeahead suggestions from the default registry."""
+    return get_registry().suggest(prefix, k)
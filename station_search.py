@@ -0,0 +1,212 @@
+# File: station_search.py
+"""
+Precomputed indexes for looking up station names without scanning every variant.
+"""
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+import heapq
+
+
+def _trigrams(text: str) -> set[str]:
+    # Pad so short names and word starts still produce useful grams
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Character trigram inverted index over a fixed set of names.
+    Candidates are generated from shared trigrams and then scored with the same
+    SequenceMatcher ratio difflib.get_close_matches uses, so cutoffs keep their meaning.
+    """
+    def __init__(self, names, max_candidates: int = 40, max_df: int = 400):
+        self.names = list(dict.fromkeys(names))
+        self.max_candidates = max_candidates
+        self.max_df = max_df
+        postings = defaultdict(list)
+        for idx, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                postings[gram].append(idx)
+        self._postings = {gram: tuple(ids) for gram, ids in postings.items()}
+
+    def _candidates(self, text: str) -> list[int]:
+        lists = [self._postings[g] for g in _trigrams(text) if g in self._postings]
+        if not lists:
+            return []
+        # Grams like "sta"/"ion" hit half the table; skip them when rarer grams exist
+        rare = [ids for ids in lists if len(ids) <= self.max_df]
+        counts = defaultdict(int)
+        for ids in rare or lists:
+            for idx in ids:
+                counts[idx] += 1
+        return heapq.nlargest(self.max_candidates, counts, key=counts.__getitem__)
+
+    def top_k(self, text: str, k: int = 3, cutoff: float = 0.6) -> list[tuple[str, float]]:
+        """
+        Return up to k (name, score) pairs with score >= cutoff, best first.
+        """
+        text = text.lower().strip()
+        if not text:
+            return []
+        sm = SequenceMatcher()
+        sm.set_seq2(text)
+        scored = []
+        for idx in self._candidates(text):
+            name = self.names[idx]
+            sm.set_seq1(name)
+            if sm.real_quick_ratio() < cutoff or sm.quick_ratio() < cutoff:
+                continue
+            score = sm.ratio()
+            if score >= cutoff:
+                scored.append((score, name))
+        return [(name, score) for score, name in heapq.nlargest(k, scored)]
+
+    def best(self, text: str, cutoff: float = 0.8) -> str | None:
+        """Closest name scoring at least cutoff, or None."""
+        hits = self.top_k(text, k=1, cutoff=cutoff)
+        return hits[0][0] if hits else None
+
+
+class Gazetteer:
+    """
+    Aho-Corasick automaton over a fixed set of lowercase names.
+    One linear pass over the lowercased text finds every occurrence; with
+    whole_words=True a hit must not touch a letter or digit on either side,
+    which matches what a LOWER PhraseMatcher sees at token boundaries.
+    Transitions live in one flat dict keyed by (state << 21 | ord(char)).
+    """
+    def __init__(self, names, whole_words: bool = True):
+        self.names = list(dict.fromkeys(names))
+        self.whole_words = whole_words
+        goto = {}
+        children = [[]]
+        terminal = [None]
+        for idx, name in enumerate(self.names):
+            state = 0
+            for ch in name:
+                key = (state << 21) | ord(ch)
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = len(children)
+                    goto[key] = nxt
+                    children.append([])
+                    terminal.append(None)
+                    children[state].append((ord(ch), nxt))
+                state = nxt
+            terminal[state] = idx
+
+        # Breadth-first failure links; outputs are merged along the failure chain
+        fail = [0] * len(children)
+        out = {}
+        queue = [child for _, child in children[0]]
+        for state in queue:
+            own = () if terminal[state] is None else (terminal[state],)
+            inherited = out.get(fail[state], ())
+            if own or inherited:
+                out[state] = own + inherited
+            for c, child in children[state]:
+                f = fail[state]
+                while True:
+                    nxt = goto.get((f << 21) | c)
+                    if nxt is not None and nxt != child:
+                        fail[child] = nxt
+                        break
+                    if f == 0:
+                        break
+                    f = fail[f]
+                queue.append(child)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._lengths = [len(name) for name in self.names]
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """
+        Return (start, end, name) for every hit, ordered by start then end.
+        """
+        text = text.lower()
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        hits = []
+        state = 0
+        for i, ch in enumerate(text):
+            c = ord(ch)
+            while True:
+                nxt = goto.get((state << 21) | c)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            found = out.get(state)
+            if not found:
+                continue
+            end = i + 1
+            for idx in found:
+                start = end - lengths[idx]
+                if self.whole_words and (
+                        (start > 0 and text[start - 1].isalnum())
+                        or (end < len(text) and text[end].isalnum())):
+                    continue
+                hits.append((start, end, self.names[idx]))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return hits
+
+
+class PrefixIndex:
+    """
+    Typeahead over station name variants: a sorted key array searched with bisect.
+    Passenger-facing names (those with a "<name> Rail Station" entry) rank first,
+    then station importance, then shorter names, then alphabetically, with one
+    suggestion per station code. Without an importance table (e.g. footfall),
+    the number of name variants a station has stands in for it.
+    """
+    # Prefix ranges wider than this have their rankings memoized
+    _MEMO_MIN_RANGE = 256
+
+    def __init__(self, stations: dict[str, str], importance: dict[str, int] = None):
+        self._keys = sorted(stations)
+        self._codes = [stations[key] for key in self._keys]
+        importance = importance or Counter(stations.values())
+        self._rank = [(not (key.endswith(" rail station") or f"{key} rail station" in stations),
+                       -importance.get(code, 0), len(key), key)
+                      for key, code in zip(self._keys, self._codes)]
+        self._memo = {}
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _pick(self, indices, k: int) -> list[tuple[str, str]]:
+        hits = []
+        seen = set()
+        for idx in indices:
+            code = self._codes[idx]
+            if code not in seen:
+                seen.add(code)
+                hits.append((self._keys[idx], code))
+                if len(hits) == k:
+                    break
+        return hits
+
+    def suggest(self, prefix: str, k: int = 5) -> list[tuple[str, str]]:
+        """
+        Return up to k (name, code) pairs whose name starts with prefix, best first.
+        """
+        prefix = " ".join(prefix.lower().split())
+        lo, hi = self._range(prefix)
+        wide = hi - lo > self._MEMO_MIN_RANGE
+        if wide and (prefix, k) in self._memo:
+            return list(self._memo[(prefix, k)])
+        rank = self._rank.__getitem__
+        # Variants of one station rank next to each other, so a few times k
+        # candidates almost always yields k distinct codes
+        ordered = heapq.nsmallest(k * 4, range(lo, hi), key=rank)
+        hits = self._pick(ordered, k)
+        if len(hits) < k and len(ordered) < hi - lo:
+            hits = self._pick(sorted(range(lo, hi), key=rank), k)
+        if wide:
+            self._memo[(prefix, k)] = tuple(hits)
+        return hits
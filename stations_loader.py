@@ -31,3 +31,22 @@ def load_station_dict(csv_path: Path) -> dict[str, str]:
                 if key and key != "\\N":
                     station_map[key.lower()] = code
     return station_map
+
+
+def load_station_data(csv_path='station_codes.csv') -> dict[str, dict]:
+    """
+    Load the CRS/TIPLOC table (columns CRS, Tiploc, Description).
+
+    Returns:
+        data: Dict mapping CRS code to {'tiploc': ..., 'name': ...}.
+    """
+    data = {}
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            name = row['Description'].strip().lower()
+            crs = row['CRS'].strip().upper()
+            tiploc = row['Tiploc'].strip().upper()
+            if crs and tiploc:
+                data[crs] = {'tiploc': tiploc, 'name': name}
+    return data
@@ -0,0 +1,343 @@
+# File: ticket_search.py
+"""
+Helpers that sit in front of trainlinescraper.find_cheapest_ticket so repeat
+searches do not each launch a browser, and so a burst of searches is turned
+away early instead of queueing without limit.
+"""
+import contextvars
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT = metrics.histogram("search_queue_wait_seconds",
+                               "Time searches spent queued before a worker picked them up.")
+
+
+def search_key(departure: str, destination: str, date, time_of_day=None,
+               trip_type: str = "single", bucket_minutes: int = 15) -> tuple:
+    """
+    Normalized identity of a ticket search: (departure, destination, ISO date,
+    time bucket, trip_type). Times within the same bucket share a key.
+    """
+    if time_of_day is None:
+        minutes = 0
+    elif isinstance(time_of_day, str):
+        hr, mn = time_of_day.split(":")
+        minutes = int(hr) * 60 + int(mn)
+    else:
+        minutes = time_of_day.hour * 60 + time_of_day.minute
+    minutes -= minutes % bucket_minutes
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        date = date.isoformat()
+    return (departure.strip().lower(), destination.strip().lower(), str(date),
+            f"{minutes // 60:02d}:{minutes % 60:02d}", (trip_type or "single").lower())
+
+
+class TicketCache:
+    """
+    TTL + LRU cache of ticket search results, keyed by search_key().
+
+    Entries live in memory; with path set they are also written to a small
+    SQLite file so results survive restarts and are shared between processes.
+    """
+    def __init__(self, ttl: float = 15 * 60, maxsize: int = 1024, path=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tickets ("
+                " key TEXT PRIMARY KEY, price REAL, url TEXT, expires REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _db_key(key: tuple) -> str:
+        return "|".join(key)
+
+    def get(self, key: tuple):
+        """Cached ticket (SimpleNamespace with price/url) or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT price, url, expires FROM tickets WHERE key = ? AND expires > ?",
+                    (self._db_key(key), now),
+                ).fetchone()
+                if row is not None:
+                    ticket = SimpleNamespace(price=row[0], url=row[1])
+                    self._remember(key, row[2], ticket)
+                    self.hits += 1
+                    return ticket
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, ticket):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires, ticket)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO tickets (key, price, url, expires) VALUES (?, ?, ?, ?)",
+                        (self._db_key(key), ticket.price, ticket.url, expires),
+                    )
+                    # Drop expired rows, then the soonest-expiring ones beyond maxsize
+                    self._db.execute("DELETE FROM tickets WHERE expires <= ?", (time.time(),))
+                    self._db.execute(
+                        "DELETE FROM tickets WHERE key NOT IN "
+                        "(SELECT key FROM tickets ORDER BY expires DESC LIMIT ?)",
+                        (self.maxsize,),
+                    )
+                    self._db.commit()
+                except sqlite3.Error:
+                    logger.warning("Could not persist ticket cache entry", exc_info=True)
+
+    def _remember(self, key: tuple, expires: float, ticket):
+        self._data[key] = (expires, ticket)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM tickets")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data),
+                "maxsize": self.maxsize, "ttl": self.ttl}
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent searches onto one underlying job.
+
+    The first submit for a key starts the job; later submits for the same key
+    attach to it while it is in flight. Each caller gets its own Future, so one
+    caller cancelling does not cancel the others; the job itself is cancelled
+    only when every caller has given up.
+    """
+    def __init__(self):
+        self.started = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, start, *args, **kwargs) -> Future:
+        """
+        Return a Future for key's result, calling start(*args, **kwargs) (which
+        must return a Future) only if no identical job is already running.
+        """
+        with self._lock:
+            entry = self._inflight.get(key)
+            started = entry is None
+            if started:
+                entry = [start(*args, **kwargs), 0]
+                self._inflight[key] = entry
+                self.started += 1
+            else:
+                self.coalesced += 1
+                logger.info(f"Coalesced search onto in-flight job for {key}")
+            entry[1] += 1
+        shared = entry[0]
+        # Registered outside the lock: a job that already finished runs it immediately
+        if started:
+            shared.add_done_callback(lambda f: self._finished(key, f))
+
+        waiter = Future()
+        waiter.add_done_callback(lambda w: self._release(entry, w))
+        shared.add_done_callback(lambda f: self._copy(f, waiter))
+        return waiter
+
+    def _finished(self, key, future: Future):
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is future:
+                del self._inflight[key]
+
+    def _release(self, entry: list, waiter: Future):
+        if not waiter.cancelled():
+            return
+        with self._lock:
+            entry[1] -= 1
+            abandoned = entry[1] == 0
+        if abandoned:
+            entry[0].cancel()
+
+    @staticmethod
+    def _copy(source: Future, waiter: Future):
+        if not waiter.set_running_or_notify_cancel():
+            return
+        if source.cancelled():
+            waiter.set_exception(CancelledError())
+        elif source.exception() is not None:
+            waiter.set_exception(source.exception())
+        else:
+            waiter.set_result(source.result())
+
+    def stats(self) -> dict:
+        """started/coalesced counts; fan_out is requests served per job started."""
+        total = self.started + self.coalesced
+        return {"started": self.started, "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+                "fan_out": total / self.started if self.started else 0.0}
+
+
+class SearchBusy(Exception):
+    """Raised when a search cannot be admitted; retry_after is a hint in seconds."""
+    def __init__(self, retry_after: float, reason: str = "search queue is full"):
+        super().__init__(f"{reason}; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class SearchScheduler:
+    """
+    Worker pool for ticket searches with a bounded wait queue.
+
+    At most `workers` searches run at once and at most `max_queue` wait behind
+    them; submit() raises SearchBusy beyond that rather than letting requests
+    sit until they time out. Queue depth, wait and run times are kept for
+    stats() and for the retry hint.
+    """
+    # Assumed search duration until real ones have been measured
+    DEFAULT_RUN_TIME = 30.0
+
+    def __init__(self, workers: int = 2, max_queue: int = 8):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.rejected = 0
+        self._queued = 0
+        self._running = 0
+        self._speculative = 0    # speculative searches admitted and not yet finished
+        self._waits = deque(maxlen=200)
+        self._run_times = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self._submit(False, fn, args, kwargs)
+
+    def submit_idle(self, fn, *args, **kwargs) -> Future:
+        """
+        Low-priority submit for speculative searches: only accepted while a worker
+        is free, and at most workers - 1 of them run at once. A started search
+        cannot be interrupted, so a cancelled one still holds its worker until
+        it finishes; the cap keeps one worker for searches someone waits for.
+        """
+        return self._submit(True, fn, args, kwargs)
+
+    def _submit(self, idle_only: bool, fn, args, kwargs) -> Future:
+        with self._lock:
+            if idle_only and (self._queued + self._running >= self.workers
+                              or self._speculative >= self.workers - 1):
+                raise SearchBusy(self._retry_after(), reason="no idle search worker")
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise SearchBusy(self._retry_after())
+            self._queued += 1
+            self.submitted += 1
+            if idle_only:
+                self._speculative += 1
+        # Run in the submitter's context so the worker's spans carry its trace id
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, self._run, time.monotonic(), fn, args, kwargs)
+        except RuntimeError:
+            # Executor already shut down (e.g. server stopping): undo the admission
+            with self._lock:
+                self._queued -= 1
+                self.submitted -= 1
+                if idle_only:
+                    self._speculative -= 1
+            raise SearchBusy(self._retry_after(), reason="search scheduler is shutting down")
+        future.add_done_callback(self._dequeue_if_cancelled)
+        if idle_only:
+            future.add_done_callback(self._speculation_done)
+        return future
+
+    def _speculation_done(self, future: Future):
+        with self._lock:
+            self._speculative -= 1
+
+    def _run(self, enqueued: float, fn, args, kwargs):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._waits.append(started - enqueued)
+        QUEUE_WAIT.observe(started - enqueued)
+        try:
+            with metrics.span("search_run"):
+                return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.monotonic() - started)
+
+    def _dequeue_if_cancelled(self, future: Future):
+        # A future cancelled while queued never reaches _run
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _run_time(self) -> float:
+        if not self._run_times:
+            return self.DEFAULT_RUN_TIME
+        return sum(self._run_times) / len(self._run_times)
+
+    def _retry_after(self) -> float:
+        # Roughly when the next worker frees up and a queue slot opens
+        return max(1.0, self._run_time() / self.workers)
+
+    def expected_wait(self) -> float:
+        """Estimated seconds a search submitted now would wait before starting."""
+        with self._lock:
+            return self._expected_wait()
+
+    def _expected_wait(self) -> float:
+        backlog = self._queued + self._running - self.workers + 1
+        return max(0.0, backlog * self._run_time() / self.workers)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = list(self._waits)
+            return {"workers": self.workers, "max_queue": self.max_queue,
+                    "queue_depth": self._queued, "running": self._running,
+                    "speculative": self._speculative,
+                    "submitted": self.submitted, "rejected": self.rejected,
+                    "avg_wait_s": sum(waits) / len(waits) if waits else 0.0,
+                    "max_wait_s": max(waits, default=0.0),
+                    "expected_wait_s": self._expected_wait(),
+                    "avg_run_s": self._run_time() if self._run_times else 0.0}
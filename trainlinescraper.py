@@ -1,8 +1,14 @@
+import atexit
 import datetime
+import re
+import threading
 import time
+from contextlib import contextmanager
 from types import SimpleNamespace
 from urllib.parse import urlencode
 
+import metrics
+
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
@@ -10,52 +16,337 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+SCRAPES = metrics.counter("scrapes", "Trainline scrapes by how the URL was obtained.", ("result",))
+DRIVER_LAUNCHES = metrics.counter("webdriver_launches", "Headless Chrome instances started.")
+DRIVER_RETIRED = metrics.counter("webdriver_retired", "Pooled drivers quit, by reason.", ("reason",))
+
+TRAINLINE_ORIGIN = "https://www.thetrainline.com"
+# Upper bound for each in-form wait (suggestions, calendar, time pickers) and its poll interval
+STEP_TIMEOUT = 5
+POLL = 0.1
+
+
+def chrome_options():
+    """Stealthy headless ChromeOptions used for every pooled driver."""
+    opts = webdriver.ChromeOptions()
+    opts.add_argument("--headless")
+    opts.add_argument("--window-size=1920,1080")
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Safari/537.36"
+    )
+    return opts
+
+
+class DriverPool:
+    """
+    Pre-launched headless Chrome drivers shared by searches.
+
+    The chromedriver path is resolved once. acquire() hands out an idle driver
+    after a health check (launching one if the pool is not yet full, otherwise
+    waiting); release() returns it, and a background thread wipes cookies and
+    storage and parks it on about:blank before it is handed out again. Drivers
+    are quit after max_uses searches, when they fail a health check or reset, or
+    when released broken, and a replacement is launched in the background.
+    """
+    def __init__(self, size: int = 2, max_uses: int = 20, driver_path: str = None):
+        self.size = size
+        self.max_uses = max_uses
+        self._driver_path = driver_path
+        self._idle = []          # [driver, uses] pairs ready to hand out
+        self._uses = {}          # id(driver) -> uses, for drivers handed out
+        self._total = 0          # launched and not yet retired
+        self._closed = False
+        self._cond = threading.Condition()
+        self._path_lock = threading.Lock()
+
+    def driver_path(self) -> str:
+        # Resolved once; the first call may download chromedriver
+        with self._path_lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+            return self._driver_path
+
+    def _launch(self):
+        driver = webdriver.Chrome(service=Service(self.driver_path()), options=chrome_options())
+        # hide webdriver flag
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument",
+            {"source": "Object.defineProperty(navigator, 'webdriver', {get:()=>undefined});"}
+        )
+        DRIVER_LAUNCHES.inc()
+        return driver
+
+    @staticmethod
+    def _healthy(driver) -> bool:
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _retire(self, driver, reason: str):
+        DRIVER_RETIRED.inc(reason=reason)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+            closed = self._closed
+        if not closed:
+            # Launch the replacement now rather than on the next search's path
+            self.prewarm()
+
+    def prewarm(self, wait: bool = False):
+        """Launch drivers until the pool is full; in a background thread unless wait."""
+        if not wait:
+            threading.Thread(target=self.prewarm, args=(True,), daemon=True,
+                             name="driver-prewarm").start()
+            return
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    return
+                self._total += 1
+            try:
+                driver = self._launch()
+            except Exception as e:
+                print(f" Could not pre-launch WebDriver: {e}")
+                with self._cond:
+                    self._total -= 1
+                return
+            with self._cond:
+                self._idle.append([driver, 0])
+                self._cond.notify()
+
+    def acquire(self, timeout: float = None):
+        """Borrow a healthy driver, launching or waiting for one as needed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No WebDriver became free in time")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    driver, uses = self._idle.pop()
+                else:
+                    self._total += 1
+                    driver, uses = None, 0
+            if driver is None:
+                try:
+                    driver = self._launch()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(driver):
+                self._retire(driver, "unhealthy")
+                continue
+            with self._cond:
+                self._uses[id(driver)] = uses
+            return driver
+
+    def release(self, driver, broken: bool = False):
+        """Return a borrowed driver; it is reset for the next search or retired."""
+        with self._cond:
+            uses = self._uses.pop(id(driver), 0) + 1
+            closed = self._closed
+        if broken or closed:
+            self._retire(driver, "broken" if broken else "closed")
+            return
+        if uses >= self.max_uses:
+            self._retire(driver, "max_uses")
+            return
+        # Resetting costs a few round trips to Chrome; keep it off the caller's path
+        threading.Thread(target=self._recycle, args=(driver, uses), daemon=True,
+                         name="driver-reset").start()
+
+    def _recycle(self, driver, uses: int):
+        try:
+            self._reset(driver)
+        except Exception:
+            self._retire(driver, "reset_failed")
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append([driver, uses])
+                self._cond.notify()
+                return
+        self._retire(driver, "closed")
+
+    @staticmethod
+    def _reset(driver):
+        # Wipe everything the last search left behind, then park on a blank page
+        try:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                   {"origin": TRAINLINE_ORIGIN, "storageTypes": "all"})
+        except Exception:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._retire(driver, "closed")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "live": self._total, "idle": len(self._idle),
+                    "in_use": len(self._uses), "max_uses": self.max_uses}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> DriverPool:
+    """Return the process-wide DriverPool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.close)
+            metrics.register_collector(_collect_pool)
+        return _pool
+
+
+def _collect_pool():
+    pool_gauge = metrics.gauge("webdriver_pool", "Pooled WebDrivers by state.", ("state",))
+    stats = _pool.stats()
+    for state in ("live", "idle", "in_use"):
+        pool_gauge.set(stats[state], state=state)
+
+
+class StepTimer:
+    """
+    Per-search step latencies, each also recorded as a metrics span. report()
+    lists them next to the fixed sleeps those steps used to include.
+    """
+    # Seconds of time.sleep each step had before the condition-driven waits
+    REPLACED_SLEEPS = {"origin": 2.5, "destination": 2.5, "calendar_month": 0.8,
+                       "day_and_time": 1.0, "submit": 0.5, "results_wait": 5.0}
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            with metrics.span(name):
+                yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        totals = {}
+        for name, elapsed in self.steps:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + elapsed, count + 1)
+        lines = [f" {'step':<16}{'took':>8}{'old sleeps':>12}"]
+        took_sum = slept_sum = 0.0
+        for name, (total, count) in totals.items():
+            slept = self.REPLACED_SLEEPS.get(name, 0.0) * count
+            took_sum += total
+            slept_sum += slept
+            lines.append(f" {name:<16}{total:>7.2f}s{slept:>11.1f}s")
+        lines.append(f" {'total':<16}{took_sum:>7.2f}s{slept_sum:>11.1f}s")
+        return "\n".join(lines)
+
+
+def _wait_quietly(wait, condition, what: str):
+    """wait.until(condition), but a timeout is only reported, not raised."""
+    try:
+        return wait.until(condition)
+    except TimeoutException:
+        print(f" Timed out waiting for {what}; carrying on")
+        return None
+
+
+def _field_value_changed(field_id: str, before: str):
+    def condition(driver):
+        value = driver.find_element(By.ID, field_id).get_attribute("value") or ""
+        return value if value and value != before else False
+    return condition
+
+
+def _words(text: str) -> set[str]:
+    # "King'S Cross London" -> {"kings", "cross", "london"}
+    return set(re.sub(r"[^\w\s]", "", text.lower()).split())
+
 
-def select_origin_and_destination(driver, origin, destination):
+def _option_matching(name: str):
+    """
+    Condition: a visible autocomplete option containing every word of the typed
+    name, in any order ("Liverpool Street London" matches "London Liverpool Street").
+    """
+    wanted = _words(name)
+
+    def condition(driver):
+        for option in driver.find_elements(By.CSS_SELECTOR, "[role='option']"):
+            try:
+                if option.is_displayed() and wanted <= _words(option.text):
+                    return option
+            except StaleElementReferenceException:
+                continue  # list re-rendered under us; look again on the next poll
+        return False
+    return condition
+
+
+def _pick_station(driver, wait, field_id, input_testid, name, label):
+    trigger = wait.until(EC.element_to_be_clickable((By.ID, field_id)))
+    before = trigger.get_attribute("value") or ""
+    trigger.click()
+    print(f" Clicked {label} input")
+
+    station_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, f"input[data-testid='{input_testid}']")))
+    station_input.clear()
+    station_input.send_keys(name)
+    print(f" Typed {label}: {name}")
+    # Press Enter once the list shows results for what was typed (not the popular or
+    # recent stations it may show first), then wait for the field to take the choice
+    short_wait = WebDriverWait(driver, STEP_TIMEOUT, poll_frequency=POLL)
+    _wait_quietly(short_wait, _option_matching(name), f"{label} suggestions matching '{name}'")
+    station_input.send_keys(Keys.RETURN)
+    _wait_quietly(short_wait, _field_value_changed(field_id, before), f"{label} selection")
+
+    selected = driver.find_element(By.ID, field_id).get_attribute("value") or ""
+    if _words(name) <= _words(selected):
+        print(f" {label.capitalize()} confirmed: {selected}")
+    else:
+        print(f" {label.capitalize()} mismatch: Got '{selected}', expected '{name}'")
+
+
+def select_origin_and_destination(driver, origin, destination, timer=None):
+    timer = timer or StepTimer()
     wait = WebDriverWait(driver, 20)
 
     # ----- ORIGIN -----
-    origin_trigger = wait.until(EC.element_to_be_clickable((By.ID, "jsf-origin-input")))
-    origin_trigger.click()
-    print(" Clicked origin input")
-
-    origin_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input[data-testid='jsf-origin']")))
-    origin_input.clear()
-    origin_input.send_keys(origin)
-    print(f" Typed origin: {origin}")
-    time.sleep(1.5)
-    origin_input.send_keys(Keys.RETURN)
-    time.sleep(1)
-
-    selected_origin = driver.find_element(By.ID, "jsf-origin-input").get_attribute("value")
-    if origin.lower() in selected_origin.lower():
-        print(f" Origin confirmed: {selected_origin}")
-    else:
-        print(f" Origin mismatch: Got '{selected_origin}', expected '{origin}'")
+    with timer.step("origin"):
+        _pick_station(driver, wait, "jsf-origin-input", "jsf-origin", origin, "origin")
 
     # ----- DESTINATION -----
-    dest_trigger = wait.until(EC.element_to_be_clickable((By.ID, "jsf-destination-input")))
-    dest_trigger.click()
-    print(" Clicked destination input")
-
-    dest_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input[data-testid='jsf-destination']")))
-    dest_input.clear()
-    dest_input.send_keys(destination)
-    print(f" Typed destination: {destination}")
-    time.sleep(1.5)
-    dest_input.send_keys(Keys.RETURN)
-    time.sleep(1)
-
-    selected_dest = driver.find_element(By.ID, "jsf-destination-input").get_attribute("value")
-    if destination.lower() in selected_dest.lower():
-        print(f" Destination confirmed: {selected_dest}")
-    else:
-        print(f" Destination mismatch: Got '{selected_dest}', expected '{destination}'")
+    with timer.step("destination"):
+        _pick_station(driver, wait, "jsf-destination-input", "jsf-destination", destination, "destination")
 
 
-def select_date_and_time(driver, field_id, target_month, target_day, hour_val, minute_val):
+def select_date_and_time(driver, field_id, target_month, target_day, hour_val, minute_val, timer=None):
+    timer = timer or StepTimer()
     wait = WebDriverWait(driver, 15)
+    short_wait = WebDriverWait(driver, STEP_TIMEOUT, poll_frequency=POLL)
     print(f" Looking for: {target_month} {target_day}")
 
     # Open calendar
@@ -71,29 +362,32 @@ def select_date_and_time(driver, field_id, target_month, target_day, hour_val, m
         if month_label == target_month:
             print(" Month found")
             try:
-                day_button = driver.find_element(
-                    By.CSS_SELECTOR,
-                    f'button[data-testid="jsf-calendar-date-button-{target_day}"]'
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", day_button)
-                day_button.click()
-                print(f" Selected: {target_month} {target_day}")
-
-                time.sleep(1)
-
-                # Select hour and minute
-                Select(driver.find_element(By.ID, "jsf-outbound-time-time-picker-hour")).select_by_value(hour_val)
-                Select(driver.find_element(By.ID, "jsf-outbound-time-time-picker")).select_by_value(minute_val)
-                print(f" Time set to {hour_val}:{minute_val}")
+                with timer.step("day_and_time"):
+                    day_button = driver.find_element(
+                        By.CSS_SELECTOR,
+                        f'button[data-testid="jsf-calendar-date-button-{target_day}"]'
+                    )
+                    driver.execute_script("arguments[0].scrollIntoView(true);", day_button)
+                    day_button.click()
+                    print(f" Selected: {target_month} {target_day}")
+
+                    # Select hour and minute as soon as the time pickers are usable
+                    hour_select = short_wait.until(EC.element_to_be_clickable(
+                        (By.ID, "jsf-outbound-time-time-picker-hour")))
+                    Select(hour_select).select_by_value(hour_val)
+                    Select(driver.find_element(By.ID, "jsf-outbound-time-time-picker")).select_by_value(minute_val)
+                    print(f" Time set to {hour_val}:{minute_val}")
 
                 return {"status": f"Selected {target_month} {target_day} {hour_val}:{minute_val}"}
             except Exception as e:
                 print(f" Could not click day {target_day} or select time:", e)
                 return {"error": f"Could not complete selection for {target_day}"}
         else:
-            driver.find_element(By.CSS_SELECTOR, 'button[data-testid="calendar-navigate-to-next-month"]').click()
-            print(" Clicked next month")
-            time.sleep(0.8)
+            with timer.step("calendar_month"):
+                driver.find_element(By.CSS_SELECTOR, 'button[data-testid="calendar-navigate-to-next-month"]').click()
+                print(" Clicked next month")
+                _wait_quietly(short_wait, lambda d: d.find_element(By.ID, "datetime-picker-label").text.strip()
+                              != month_label, "calendar to change month")
 
     return {"error": f"Could not reach {target_month}"}
 
@@ -109,6 +403,7 @@ def build_trainline_link(departure_code, destination_code, date, time_of_day):
     return "https://www.thetrainline.com/search?" + urlencode(params)
 
 
+@metrics.traced("scrape")
 def find_cheapest_ticket(departure, destination,
                          date, time_of_day=None,
                          trip_type="single", return_date=None, return_time=None):
@@ -126,62 +421,49 @@ def find_cheapest_ticket(departure, destination,
         hr, mn = time_of_day.strftime("%H"), time_of_day.strftime("%M")
         time_of_day = f"{hr}:{mn}"
 
-    # 2) Stealthy ChromeOptions
-    opts = webdriver.ChromeOptions()
-    opts.add_argument("--headless") 
-    opts.add_argument("--window-size=1920,1080")
-    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-    opts.add_experimental_option("useAutomationExtension", False)
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/114.0.0.0 Safari/537.36"
-    )
+    # 2) Borrow a warm headless Chrome from the pool
+    pool = get_pool()
+    with metrics.span("driver_acquire"):
+        driver = pool.acquire()
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=opts
-    )
-    # hide webdriver flag
-    driver.execute_cdp_cmd(
-        "Page.addScriptToEvaluateOnNewDocument",
-        {"source": "Object.defineProperty(navigator, 'webdriver', {get:()=>undefined});"}
-    )
-    
     # Increased timeout for slow connections
     wait = WebDriverWait(driver, 30)  # Increased from 20 to 30 seconds
 
     results_url = None
-    
+    broken = False
+    timer = StepTimer()
+
     try:
-        driver.get("https://www.thetrainline.com")
-        print(" Loaded Trainline homepage")
+        with timer.step("homepage"):
+            driver.get("https://www.thetrainline.com")
+            print(" Loaded Trainline homepage")
+
+            # accept cookies/remove overlays
+            try:
+                cookie_button = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
+                cookie_button.click()
+                print(" Accepted cookies")
+            except Exception as e:
+                print(f" Cookie banner handling: {e}")
+
+            try:
+                driver.execute_script("document.querySelector('.onetrust-pc-dark-filter')?.remove();")
+            except:
+                pass
 
-        # accept cookies/remove overlays
-        try:
-            cookie_button = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
-            cookie_button.click()
-            print(" Accepted cookies")
-        except Exception as e:
-            print(f" Cookie banner handling: {e}")
-            
-        try:
-            driver.execute_script("document.querySelector('.onetrust-pc-dark-filter')?.remove();")
-        except:
-            pass
-            
         # fill in form
-        select_origin_and_destination(driver, departure, destination)
-        
-        select_date_and_time(
-            driver,
-            field_id="jsf-outbound-time-input-toggle",
-            target_month=date.strftime("%B %Y"),
-            target_day=str(date.day),
-            hour_val=hr,
-            minute_val=mn
-        )
+        with metrics.span("form_fill"):
+            select_origin_and_destination(driver, departure, destination, timer=timer)
+
+            select_date_and_time(
+                driver,
+                field_id="jsf-outbound-time-input-toggle",
+                target_month=date.strftime("%B %Y"),
+                target_day=str(date.day),
+                hour_val=hr,
+                minute_val=mn,
+                timer=timer
+            )
 
         # remove any remaining overlays
         try:
@@ -189,93 +471,106 @@ def find_cheapest_ticket(departure, destination,
         except:
             pass
             
-        # Find and click submit
-        try:
-            print(" Looking for submit button")
-            submit_button = wait.until(EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, "button[data-testid='jsf-submit']")
-            ))
-            print(" Found submit button")
-            driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-            time.sleep(0.5)
-            submit_button.click()
-            print(" Clicked submit button")
-        except Exception as e:
-            print(f" Submit button error: {e}")
-            
-            # Try alternative method
-            try:
-                buttons = driver.find_elements(By.TAG_NAME, "button")
-                for button in buttons:
-                    if "search" in button.text.lower():
-                        print(f" Found alternative submit button with text: {button.text}")
-                        button.click()
-                        print(" Clicked alternative submit button")
-                        break
-            except Exception as e2:
-                print(f" Alternative submit failed: {e2}")
-
-        # Wait for the page to load with various checks
-        # Increased timeout for this critical step
-        longer_wait = WebDriverWait(driver, 45)
-        
-        print(" Waiting for results page to load...")
-        
-        # Try multiple possible indicators that the page has loaded
-        possible_result_indicators = [
-            (By.CSS_SELECTOR, "[data-testid='outbound-journey']"),
-            (By.CSS_SELECTOR, ".journey-option"),
-            (By.CSS_SELECTOR, ".results-list"),
-            (By.CSS_SELECTOR, "[id*='journey']"),
-            (By.CSS_SELECTOR, "[class*='result']"),
-            (By.CSS_SELECTOR, "h1"),  # Even just finding any H1 is a sign the page loaded
-        ]
-        
-        found_results = False
-        for selector_type, selector_value in possible_result_indicators:
-            try:
-                longer_wait.until(EC.presence_of_element_located((selector_type, selector_value)))
-                print(f" Results page loaded - found element: {selector_type}='{selector_value}'")
-                found_results = True
-                break
-            except:
-                pass
-                
-        if not found_results:
-            print(" Could not definitively confirm results page loaded")
-        
-        # Wait a bit to ensure page fully stabilizes
-        time.sleep(5)
-        
-        # Get URL even if we couldn't find result elements
-        # Multiple methods to get the URL
-        url_methods = [
-            lambda: driver.current_url,
-            lambda: driver.execute_script("return window.location.href;"),
-            lambda: driver.execute_script("return document.URL;")
-        ]
-        
-        for i, url_method in enumerate(url_methods, 1):
+        form_url = driver.current_url
+        with timer.step("submit"):
+            # Find and click submit
             try:
-                results_url = url_method()
-                if results_url and results_url != "https://www.thetrainline.com/":
-                    print(f" Got URL method {i}: {results_url}")
-                    break
-                else:
-                    print(f"️ URL method {i} returned invalid URL: {results_url}")
+                print(" Looking for submit button")
+                submit_locator = (By.CSS_SELECTOR, "button[data-testid='jsf-submit']")
+                submit_button = wait.until(EC.element_to_be_clickable(submit_locator))
+                print(" Found submit button")
+                driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
+                # Still clickable after scrolling (no overlay or animation in the way)
+                submit_button = wait.until(EC.element_to_be_clickable(submit_locator))
+                submit_button.click()
+                print(" Clicked submit button")
             except Exception as e:
-                print(f" URL method {i} failed: {e}")
-        
+                print(f" Submit button error: {e}")
+
+                # Try alternative method
+                try:
+                    buttons = driver.find_elements(By.TAG_NAME, "button")
+                    for button in buttons:
+                        if "search" in button.text.lower():
+                            print(f" Found alternative submit button with text: {button.text}")
+                            button.click()
+                            print(" Clicked alternative submit button")
+                            break
+                except Exception as e2:
+                    print(f" Alternative submit failed: {e2}")
+
+        with timer.step("results_wait"):
+            # Wait for the page to load with various checks
+            # Increased timeout for this critical step
+            longer_wait = WebDriverWait(driver, 45, poll_frequency=POLL)
+
+            print(" Waiting for results page to load...")
+            _wait_quietly(longer_wait, EC.url_changes(form_url), "the results URL")
+
+            # Try multiple possible indicators that the page has loaded
+            possible_result_indicators = [
+                (By.CSS_SELECTOR, "[data-testid='outbound-journey']"),
+                (By.CSS_SELECTOR, ".journey-option"),
+                (By.CSS_SELECTOR, ".results-list"),
+                (By.CSS_SELECTOR, "[id*='journey']"),
+                (By.CSS_SELECTOR, "[class*='result']"),
+                (By.CSS_SELECTOR, "h1"),  # Even just finding any H1 is a sign the page loaded
+            ]
+
+            # One wait for whichever indicator shows up first
+            def any_indicator(d):
+                for locator in possible_result_indicators:
+                    if d.find_elements(*locator):
+                        return locator
+                return False
+
+            found = _wait_quietly(longer_wait, any_indicator, "results page elements")
+            if found:
+                print(f" Results page loaded - found element: {found[0]}='{found[1]}'")
+            else:
+                print(" Could not definitively confirm results page loaded")
+
+            # Let the results page finish loading rather than sleeping a fixed time
+            _wait_quietly(WebDriverWait(driver, STEP_TIMEOUT, poll_frequency=POLL),
+                          lambda d: d.execute_script("return document.readyState;") == "complete",
+                          "the page to finish loading")
+
+        with timer.step("url_capture"):
+            # Get URL even if we couldn't find result elements
+            # Multiple methods to get the URL
+            url_methods = [
+                lambda: driver.current_url,
+                lambda: driver.execute_script("return window.location.href;"),
+                lambda: driver.execute_script("return document.URL;")
+            ]
+
+            for i, url_method in enumerate(url_methods, 1):
+                try:
+                    results_url = url_method()
+                    if results_url and results_url != "https://www.thetrainline.com/":
+                        print(f" Got URL method {i}: {results_url}")
+                        break
+                    else:
+                        print(f"️ URL method {i} returned invalid URL: {results_url}")
+                except Exception as e:
+                    print(f" URL method {i} failed: {e}")
+
     except Exception as e:
         print(f" General error: {e}")
+        # Page errors leave the browser usable; only a dead one is kept from the next search
+        broken = not pool._healthy(driver)
     finally:
-        print(" Quitting WebDriver")
-        driver.quit()
+        print(" Returning WebDriver to the pool")
+        pool.release(driver, broken=broken)
+        print(" Step latency:\n" + timer.report())
 
     # fallback if needed
     if not results_url or "thetrainline.com" not in results_url:
         print(" Using fallback URL generation")
         results_url = build_trainline_link(departure, destination, date, time_of_day)
+        SCRAPES.inc(result="fallback")
+    else:
+        SCRAPES.inc(result="results_page")
 
     return SimpleNamespace(price=None, url=results_url)
 